@@ -0,0 +1,79 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse, json, zlib
+
+from constants import *
+from utility import ATLAS_DIR, import_subfolders, source_signature
+
+# every folder of animations the game loads through import_subfolders, one atlas each
+ATLAS_SETS = [
+    ("assets", "graphics", "player"),
+    ("assets", "graphics", "enemies", "sbasic"),
+    ("assets", "graphics", "enemies", "wbasic"),
+    ("assets", "graphics", "enemies", "dbasic"),
+    ("assets", "graphics", "enemies", "bossSamurai"),
+    ("assets", "graphics", "enemies", "bossArcher"),
+    ("assets", "graphics", "background"),
+    ("assets", "graphics", "ui", "player"),
+    ("assets", "graphics", "ui", "bossArcher"),
+    ("assets", "graphics", "ui", "bossSamurai"),
+    ("assets", "graphics", "ui", "menu")
+]
+MAX_ATLAS_WIDTH = 2048
+
+def shelve(sizes, width):
+    # shelves of frames sorted by height, filled left to right
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for index in sorted(range(len(sizes)), key = lambda i: (-sizes[i][1], -sizes[i][0])):
+        w, h = sizes[index]
+        if x + w > width:
+            x, y, shelf_height = 0, y + shelf_height, 0
+        positions[index] = (x, y)
+        x += w
+        shelf_height = max(shelf_height, h)
+    return positions, (width, y + shelf_height)
+
+def pack(sizes):
+    # the width that leaves the least empty space, decoding cost grows with the atlas area
+    widest = max(w for w, _ in sizes)
+    widths = range(widest, max(min(MAX_ATLAS_WIDTH, sum(w for w, _ in sizes)), widest) + 1, 8)
+    return min((shelve(sizes, width) for width in widths), key = lambda packing: packing[1][0] * packing[1][1])
+
+def build(path):
+    frame_dict = import_subfolders(*path, atlas = False)
+    frames = [(name, frame) for name, animation in frame_dict.items() for frame in animation]
+    positions, size = pack([frame.get_size() for _, frame in frames])
+
+    # max blending onto a clear surface copies the pixels, alpha included, instead of blending them
+    atlas = pygame.Surface(size, pygame.SRCALPHA)
+    atlas.fill((0, 0, 0, 0))
+    rects = {name: [] for name in frame_dict}
+    for (name, frame), pos in zip(frames, positions):
+        atlas.blit(frame, pos, special_flags = pygame.BLEND_RGBA_MAX)
+        rects[name].append([*pos, *frame.get_size()])
+
+    # raw pixels in the byte order convert_alpha produces, so loading is an inflate and a straight copy
+    image = f"{'_'.join(path[2:])}.atlas"
+    with open(os.path.join(ATLAS_DIR, image), 'wb') as atlasf:
+        atlasf.write(zlib.compress(pygame.image.tobytes(atlas, 'BGRA'), 9))
+    return {'image': image, 'size': size, 'signature': source_signature(*path), 'frames': rects}
+
+def main():
+    parser = argparse.ArgumentParser(description = "Pack the animation frame folders into atlases and an index the game loads instead.")
+    parser.parse_args()
+
+    pygame.display.set_mode((1, 1)) # frames are converted the same way the game converts them
+    os.makedirs(ATLAS_DIR, exist_ok = True)
+    index = {}
+    for path in ATLAS_SETS:
+        index['/'.join(path)] = entry = build(path)
+        count = sum(len(rects) for rects in entry['frames'].values())
+        print(f"{'/'.join(path)}: {count} frames -> {entry['image']}")
+
+    with open(os.path.join(ATLAS_DIR, "index.json"), 'w') as jsonf:
+        json.dump(index, jsonf, indent = 2)
+
+if __name__ == "__main__":
+    main()
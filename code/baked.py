@@ -0,0 +1,160 @@
+import argparse, hashlib, json, re, struct, zlib
+from array import array
+from types import SimpleNamespace
+
+import pytmx
+from pytmx.util_pygame import load_pygame, handle_transformation, smart_convert
+
+from constants import *
+
+# magic, version, sha1 of the tmx and its tilesets, width and height in tiles, metadata length
+# followed by the compressed metadata json and one little endian uint16 tile array per tile layer
+HEADER = struct.Struct('<4sB20sHHI')
+MAGIC = b'BHLV'
+VERSION = 1
+BAKED_DIR = os.path.join(abs_path, "data", "lvl")
+
+TILESET_SOURCE = re.compile(rb'<tileset[^>]*source="([^"]+\.tsx)"')
+
+def source_path(name):
+    return os.path.join(abs_path, "data", "tmx", MAPS[name])
+
+def baked_path(name):
+    return os.path.join(BAKED_DIR, f"{name}.lvl")
+
+def source_digest(path):
+    # the map and every external tileset it references, tile rects come from the tilesets
+    with open(path, 'rb') as tmxf:
+        source = tmxf.read()
+    digest = hashlib.sha1(source)
+    for tileset in TILESET_SOURCE.findall(source):
+        with open(os.path.join(os.path.dirname(path), tileset.decode()), 'rb') as tsxf:
+            digest.update(tsxf.read())
+    return digest.digest()
+
+def describe_image(filename, colorkey, **kwargs):
+    # stands in for the pygame loader, records where each tile comes from instead of loading it
+    image = os.path.relpath(os.path.normpath(filename), abs_path).replace(os.sep, '/')
+    pixelalpha = kwargs.get('pixelalpha', True)
+    return lambda rect = None, flags = None: (image, colorkey, pixelalpha, rect and list(rect), flags and list(flags))
+
+def bake(name):
+    path = source_path(name)
+    tmx_map = pytmx.TiledMap(path, image_loader = describe_image)
+
+    # tiles are renumbered densely, 0 stays empty
+    tiles, indices, layers, data = [None], {}, [], []
+    for layer in tmx_map.layers:
+        entry = {'name': layer.name, 'properties': layer.properties}
+        if isinstance(layer, pytmx.TiledTileLayer):
+            tile_ids = array('H', bytes(2 * tmx_map.width * tmx_map.height))
+            for x, y, gid in layer.iter_data():
+                if gid:
+                    if gid not in indices:
+                        indices[gid] = len(tiles)
+                        tiles.append(tmx_map.images[gid])
+                    tile_ids[y * tmx_map.width + x] = indices[gid]
+            data.append(tile_ids)
+        elif isinstance(layer, pytmx.TiledObjectGroup):
+            entry['objects'] = [
+                {'id': obj.id, 'name': obj.name, 'type': obj.type, 'x': obj.x, 'y': obj.y, 'width': obj.width, 'height': obj.height, 'properties': obj.properties}
+                for obj in layer
+            ]
+        layers.append(entry)
+
+    metadata = json.dumps({'tiles': tiles, 'layers': layers}, separators = (',', ':')).encode()
+    os.makedirs(BAKED_DIR, exist_ok = True)
+    with open(baked_path(name), 'wb') as lvlf:
+        lvlf.write(HEADER.pack(MAGIC, VERSION, source_digest(path), tmx_map.width, tmx_map.height, len(metadata)))
+        for tile_ids in data:
+            if sys.byteorder == 'big':
+                tile_ids.byteswap()
+        lvlf.write(zlib.compress(metadata + b''.join(tile_ids.tobytes() for tile_ids in data), 9))
+
+class TileLayer:
+    def __init__(self, name, properties, width, tile_ids, images):
+        self.name = name
+        self.properties = properties
+        self.width = width
+        self.tile_ids = tile_ids
+        self.images = images
+
+    def tiles(self):
+        # same order as pytmx, row by row
+        for index, tile in enumerate(self.tile_ids):
+            if tile:
+                yield index % self.width, index // self.width, self.images[tile]
+
+class ObjectGroup(list):
+    def __init__(self, name, properties, objects):
+        super().__init__(objects)
+        self.name = name
+        self.properties = properties
+
+class BakedMap:
+    # the parts of a pytmx map the level reads, built from one baked file
+    def __init__(self, data):
+        _, _, self.digest, self.width, self.height, length = HEADER.unpack_from(data)
+        data = zlib.decompress(data[HEADER.size:])
+        metadata = json.loads(data[:length])
+        self.images = self.load_images(metadata['tiles'])
+
+        self.layers = {}
+        offset = length
+        for entry in metadata['layers']:
+            if 'objects' in entry:
+                # properties are read as attributes like on pytmx objects, the object's own fields win
+                objects = [SimpleNamespace(**{**obj.pop('properties'), **obj}) for obj in entry['objects']]
+                self.layers[entry['name']] = ObjectGroup(entry['name'], entry['properties'], objects)
+            else:
+                tile_ids = array('H', data[offset:offset + 2 * self.width * self.height])
+                if sys.byteorder == 'big':
+                    tile_ids.byteswap()
+                offset += 2 * self.width * self.height
+                self.layers[entry['name']] = TileLayer(entry['name'], entry['properties'], self.width, tile_ids, self.images)
+
+    @staticmethod
+    def load_images(tiles):
+        # each tileset image is decoded once, tiles are cut from it the way pytmx does
+        sources, images = {}, [None]
+        for image, colorkey, pixelalpha, rect, flags in tiles[1:]:
+            if image not in sources:
+                sources[image] = pygame.image.load(os.path.join(abs_path, *image.split('/')))
+            tile = sources[image].subsurface(rect) if rect else sources[image].copy()
+            if flags:
+                tile = handle_transformation(tile, pytmx.TileFlags(*flags))
+            images.append(smart_convert(tile, colorkey and pygame.Color(f"#{colorkey}"), pixelalpha))
+        return images
+
+    def get_layer_by_name(self, name):
+        return self.layers[name]
+
+def load_map(name):
+    # the baked file when it is current, otherwise the tmx it would be baked from
+    source = source_path(name)
+    path = baked_path(name)
+    if os.path.exists(path):
+        with open(path, 'rb') as lvlf:
+            data = lvlf.read()
+        try:
+            magic, version, digest = HEADER.unpack_from(data)[:3]
+            if magic == MAGIC and version == VERSION and (not os.path.exists(source) or digest == source_digest(source)):
+                return BakedMap(data)
+        except (struct.error, zlib.error, ValueError): # truncated or corrupt, the tmx is still there to fall back on
+            pass
+    return load_pygame(source)
+
+def main():
+    parser = argparse.ArgumentParser(description = "Bake tmx maps into binary level files the game loads without parsing xml.")
+    parser.add_argument('maps', nargs = '*', default = list(MAPS), help = f"maps to bake out of {', '.join(MAPS)}, all by default")
+    args = parser.parse_args()
+    for name in args.maps:
+        if name not in MAPS:
+            parser.error(f"unknown map {name}")
+
+    for name in args.maps:
+        bake(name)
+        print(f"{source_path(name)} -> {baked_path(name)} {os.path.getsize(baked_path(name))} bytes")
+
+if __name__ == "__main__":
+    main()
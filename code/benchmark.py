@@ -0,0 +1,202 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse, json
+from statistics import mean, quantiles
+from time import perf_counter
+
+from constants import *
+from settings import *
+from timer import scheduler
+from presenter import presenter
+from music import music
+from controls import controls, keys_from_mask
+from replay import Replay
+
+from main import Game
+from enemies import BasicSwordsman, BossSamurai, BossArcher
+
+SUBSYSTEMS = ('update', 'hitboxes', 'draw', 'ui', 'present')
+
+# key timelines, called every tick with the tick number and the running level
+def sweep_keys(tick, level):
+    keys = [RIGHT_KEY]
+    if tick % 45 == 0:
+        keys.append(JUMP_KEY)
+    if tick % 120 == 0:
+        keys.append(DASH_KEY)
+    return keys
+
+def fight_keys(tick, level):
+    player = level.player
+    targets = [sprite for sprite in level.attacking_sprites if sprite is not player and sprite.hp > 0]
+    if not targets:
+        return []
+
+    target = min(targets, key = lambda x: abs(x.hitbox_rect.centerx - player.hitbox_rect.centerx))
+    distance = target.hitbox_rect.centerx - player.hitbox_rect.centerx
+    keys = []
+    if abs(distance) > 20:
+        keys.append(RIGHT_KEY if distance > 0 else LEFT_KEY)
+    if tick % 20 < 4:
+        keys.append(ATTACK_KEY)
+    if tick % 150 == 0:
+        keys.append(DASH_KEY)
+    if tick % 200 == 100 and player.hp < PlAYER_HEALTH / 2:
+        keys.append(HEAL_KEY)
+    return keys
+
+# scenario setups, place the player and enemies for a repeatable workload
+def place_player(level, pos):
+    level.player.hitbox_rect.midbottom = pos
+    level.player.prev_rect = level.player.hitbox_rect.copy()
+    level.player.camera_rect.center = level.player.hitbox_rect.center
+
+def endure(player):
+    # the scripted player takes damage but never falls, so every scenario keeps its workload to the end
+    def take_damage(damage):
+        player.hp = max(player.hp - damage, 1)
+    player.take_damage = take_damage
+
+def setup_brawl(level):
+    swordsmen = [sprite for sprite in level.attacking_sprites if isinstance(sprite, BasicSwordsman)]
+    x, y = level.player.hitbox_rect.midbottom
+    for index, swordsman in enumerate(swordsmen):
+        swordsman.hitbox_rect.midbottom = (x + 60 + index * 30 * (-1) ** index, y - 10)
+        swordsman.prev_rect = swordsman.hitbox_rect.copy()
+
+def setup_boss(boss_type):
+    def setup(level):
+        boss = next(sprite for sprite in level.attacking_sprites if isinstance(sprite, boss_type))
+        place_player(level, (boss.hitbox_rect.centerx - 80, boss.hitbox_rect.bottom - 10))
+    return setup
+
+SCENARIOS = {
+    'menu_idle': ('main_menu', 600, None, None),
+    'sweep_spring': ('spring', 900, sweep_keys, None),
+    'sweep_winter': ('winter', 900, sweep_keys, None),
+    'sweep_desert': ('desert', 900, sweep_keys, None),
+    'sweep_test': ('test', 600, sweep_keys, None),
+    'brawl': ('desert', 900, fight_keys, setup_brawl),
+    'samurai_fight': ('winter', 1200, fight_keys, setup_boss(BossSamurai)),
+    'archer_fight': ('desert', 1200, fight_keys, setup_boss(BossArcher)),
+}
+
+def instrument(obj, name, timings, subsystem):
+    # shadows the bound method on the instance, deleting the attribute restores it
+    method = getattr(obj, name)
+    def timed(*args, **kwargs):
+        start = perf_counter()
+        result = method(*args, **kwargs)
+        timings[subsystem] += perf_counter() - start
+        return result
+    setattr(obj, name, timed)
+    return obj, name
+
+def start_stage(game, name):
+    stage = game.get_stage(name)
+    if name != 'main_menu':
+        game.reset_level(stage, seed = 0)
+    game.current_stage = stage
+    return stage
+
+def run_scenario(game, name, replay = None):
+    if replay: # a recorded session, re-run exactly as it was played
+        stage_name, frames = replay.stage, len(replay.masks)
+        stage = replay.start(game)
+        timeline = lambda tick, level: keys_from_mask(replay.masks[tick])
+    else:
+        stage_name, frames, timeline, setup = SCENARIOS[name]
+        stage = start_stage(game, stage_name)
+        if stage_name != 'main_menu':
+            endure(stage.player)
+        if setup:
+            setup(stage)
+
+    timings = dict.fromkeys(SUBSYSTEMS, 0)
+    if stage_name != 'main_menu':
+        instrumented = [
+            instrument(stage.all_sprites, 'update', timings, 'update'),
+            instrument(stage.attacking_sprites, 'update', timings, 'hitboxes'),
+            instrument(stage.damage_sprites, 'update', timings, 'hitboxes'),
+            instrument(stage.damage_sprites, 'build_broadphase', timings, 'hitboxes'),
+            instrument(stage, 'update_ui', timings, 'ui')
+        ]
+        draw_groups = (stage.all_sprites, stage.damage_sprites, stage.ui_sprites, stage.text_sprites)
+    else:
+        instrumented = [instrument(stage.sprites, 'update', timings, 'update')]
+        draw_groups = (stage.bg_sprites, stage.graphic_sprites, stage.button_sprites, stage.text_sprites)
+    instrumented += [instrument(group, 'draw', timings, 'draw') for group in draw_groups]
+
+    controls.source = (lambda: timeline(tick, stage)) if timeline else (lambda: [])
+    frame_times = []
+    drawn = culled = 0 # sprites, chunks and signs the camera let through or skipped
+    for tick in range(frames):
+        start = perf_counter()
+        pygame.event.pump()
+        dt = scheduler.advance(STEP)
+        controls.poll()
+        stage.run(dt)
+        drawn += stage.camera.drawn
+        culled += stage.camera.culled
+
+        present_start = perf_counter()
+        presenter.present(game.display_surf)
+        timings['present'] += perf_counter() - present_start
+        frame_times.append((perf_counter() - start) * 1000)
+
+    for obj, method in instrumented:
+        delattr(obj, method)
+    controls.source = None
+
+    percentiles = quantiles(frame_times, n = 100)
+    return {
+        'stage': stage_name,
+        'frames': frames,
+        'mean_ms': mean(frame_times),
+        'p50_ms': percentiles[49],
+        'p95_ms': percentiles[94],
+        'p99_ms': percentiles[98],
+        'subsystems_ms': {subsystem: timings[subsystem] * 1000 / frames for subsystem in SUBSYSTEMS},
+        'drawn_per_frame': drawn / frames,
+        'culled_per_frame': culled / frames,
+        'status': getattr(stage, 'status', None)
+    }
+
+def compare(results, baseline):
+    comparison = {}
+    for name, result in results.items():
+        if name in baseline:
+            comparison[name] = {
+                key: result[key] / baseline[name][key] if baseline[name][key] else None
+                for key in ('mean_ms', 'p50_ms', 'p95_ms', 'p99_ms')
+            }
+    return comparison
+
+def main():
+    parser = argparse.ArgumentParser(description = "Headless frame time benchmark of scripted scenarios.")
+    parser.add_argument('scenarios', nargs = '*', default = list(SCENARIOS), help = "scenarios to run, all by default")
+    parser.add_argument('--output', help = "write the results as json to this file")
+    parser.add_argument('--baseline', help = "json results of an earlier run to compare against")
+    parser.add_argument('--replay', nargs = '+', default = [], help = "replay files to run as extra scenarios, named by file")
+    args = parser.parse_args()
+
+    game = Game()
+    music.stop(0)
+
+    results = {name: run_scenario(game, name) for name in args.scenarios}
+    for path in args.replay:
+        results[os.path.basename(path)] = run_scenario(game, path, Replay.load(path))
+    report = {'results': results}
+    if args.baseline:
+        with open(args.baseline) as jsonf:
+            report['comparison'] = compare(results, json.load(jsonf)['results'])
+
+    if args.output:
+        with open(args.output, 'w') as jsonf:
+            json.dump(report, jsonf, indent = 2)
+    print(json.dumps(report, indent = 2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+from constants import *
+
+class Camera:
+    def __init__(self, width, height):
+        self.offset = vector(0, 0)
+        self.width, self.height = width, height
+        self.view_rect = pygame.FRect(0, 0, GAME_WIDTH, GAME_HEIGHT)
+
+        # per frame culling statistics
+        self.drawn = 0
+        self.culled = 0
+
+    def handle_offset(self, target_pos):
+        self.offset.x = -(target_pos[0] - GAME_WIDTH / 2)
+        self.offset.y = -(target_pos[1] - GAME_HEIGHT / 2)
+
+    def camera_constraint(self):
+        self.offset.x = self.offset.x if self.offset.x < 0 else 0
+        self.offset.x = self.offset.x if self.offset.x > -self.width + GAME_WIDTH else -self.width + GAME_WIDTH
+        self.offset.y = self.offset.y if self.offset.y > -self.height + GAME_HEIGHT else -self.height + GAME_HEIGHT
+
+    def update(self, target_pos):
+        self.handle_offset(target_pos)
+        self.camera_constraint()
+        self.view_rect.topleft = -self.offset
+
+        self.drawn = 0
+        self.culled = 0
+
+    def count(self, visible):
+        if visible:
+            self.drawn += 1
+        else:
+            self.culled += 1
+        return visible
+
+    def visible(self, rect):
+        return self.count(self.view_rect.colliderect(rect))
@@ -0,0 +1,92 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import time
+from pytmx.util_pygame import load_pygame
+
+from constants import *
+from sprite import Sprite
+from groups import CollisionSprites
+
+SAMPLES = 2000
+REPEATS = 5
+
+# reference implementation of the full scan previously used by Player and Enemy
+def scan_surface_collisions(collision_sprites, hitbox_rect, prev_rect, axis):
+    for sprite in collision_sprites:
+        if sprite.rect.colliderect(hitbox_rect):
+            if axis == 'x':
+                if hitbox_rect.left <= sprite.rect.right:
+                    if int(prev_rect.left) >= int(sprite.prev_rect.right):
+                        hitbox_rect.left = sprite.rect.right
+
+                if hitbox_rect.right >= sprite.rect.left:
+                    if int(prev_rect.right) <= int(sprite.prev_rect.left):
+                        hitbox_rect.right = sprite.rect.left
+            else:
+                if hitbox_rect.top <= sprite.rect.bottom:
+                    if int(prev_rect.top) >= int(sprite.prev_rect.bottom):
+                        hitbox_rect.top = sprite.rect.bottom
+
+                if hitbox_rect.bottom >= sprite.rect.top:
+                    if int(prev_rect.bottom) <= int(sprite.prev_rect.top):
+                        hitbox_rect.bottom = sprite.rect.top
+    return hitbox_rect
+
+def grid_surface_collisions(collision_sprites, hitbox_rect, prev_rect, axis):
+    return scan_surface_collisions(collision_sprites.nearby(hitbox_rect.union(prev_rect)), hitbox_rect, prev_rect, axis)
+
+def scan_probe(collision_sprites, probe):
+    return probe.collidelist([sprite.rect for sprite in collision_sprites]) >= 0
+
+def grid_probe(collision_sprites, probe):
+    return collision_sprites.collide(probe)
+
+def load_collision_sprites(tmx_map):
+    collision_sprites = CollisionSprites()
+    for layer in ["ground", "barrier"]:
+        for x, y, surf in tmx_map.get_layer_by_name(layer).tiles():
+            Sprite((x * TILE_SIZE, y * TILE_SIZE), surf, collision_sprites)
+    return collision_sprites
+
+def make_samples(width, height):
+    samples = []
+    for _ in range(SAMPLES):
+        prev_rect = pygame.FRect(random.uniform(0, width), random.uniform(0, height), 8, 32)
+        hitbox_rect = prev_rect.move(random.uniform(-6, 6), random.uniform(-6, 6))
+        samples.append((hitbox_rect, prev_rect))
+    return samples
+
+def run(method, probe, collision_sprites, samples):
+    results = []
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        results.clear()
+        for hitbox_rect, prev_rect in samples:
+            rect = method(collision_sprites, hitbox_rect.copy(), prev_rect, 'x')
+            rect = method(collision_sprites, rect, prev_rect, 'y')
+            ground = probe(collision_sprites, pygame.FRect(rect.bottomleft, (rect.width, 2)))
+            edge = probe(collision_sprites, pygame.FRect(rect.bottomright, (-1, 10)))
+            results.append((tuple(rect), ground, edge))
+    elapsed = (time.perf_counter() - start) / (REPEATS * len(samples))
+    return elapsed, results
+
+def main():
+    pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT))
+    random.seed(0)
+
+    for name, file in MAPS.items():
+        tmx_map = load_pygame(os.path.join(abs_path, "data", "tmx", file))
+        collision_sprites = load_collision_sprites(tmx_map)
+        samples = make_samples(tmx_map.width * TILE_SIZE, tmx_map.height * TILE_SIZE)
+
+        scan_time, scan_results = run(scan_surface_collisions, scan_probe, collision_sprites, samples)
+        grid_time, grid_results = run(grid_surface_collisions, grid_probe, collision_sprites, samples)
+
+        print(f"{name:<8} tiles: {len(collision_sprites):>5}  "
+              f"scan: {scan_time * 1e6:8.2f} us  grid: {grid_time * 1e6:6.2f} us  "
+              f"speedup: {scan_time / grid_time:6.1f}x  "
+              f"match: {scan_results == grid_results}")
+
+if __name__ == "__main__":
+    main()
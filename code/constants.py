@@ -11,6 +11,8 @@ abs_path = os.path.split(os.path.split(os.path.abspath(__file__))[0])[0]
 
 # abs_path = os.path.split(os.path.abspath(__file__))[0]
 
+FONT_PATH = os.path.join(abs_path, "data", "ttf", "PixelifySans.ttf")
+
 DISPLAY_INFO = pygame.display.Info()
 GAME_WIDTH, GAME_HEIGHT = 426, 240
 
@@ -19,20 +21,54 @@ WINDOW_WIDTH, WINDOW_HEIGHT = GAME_WIDTH * SCALE_FACTOR, GAME_HEIGHT * SCALE_FAC
 
 MASTER_DISPLAY = pygame.surface.Surface((GAME_WIDTH, GAME_HEIGHT))
 
+# final upscale: 'scaled' (sdl), 'integer' (whole multiples, letterboxed) or 'nearest'
+PRESENT_MODE = 'scaled'
+
 # game
-FPS = 60
+FPS = 60 # fixed simulation ticks per second
+STEP = 1 / FPS
+MAX_STEPS = 5 # catch-up ticks per rendered frame before the backlog is dropped
+MAX_FRAME_SKIP = 2 # rendered frames skipped in a row while catching up
+RENDER_FPS = 240 # render cap, vsync paces the loop on most displays
+MAX_TICKS = FPS * 180 # simulated fights and episodes still going after three minutes are cut off
 ANIMATION_SPEED = 10
 TILE_SIZE = 16
 
 GRAVITY = 800
 PlAYER_HEALTH = 70
 
+MAPS = {
+    "test": "testmap.tmx",
+    "spring": "spring.tmx",
+    "winter": "winter.tmx",
+    "desert": "desert.tmx"
+}
+LEVEL_EVICT_TIME = 120000 # ms a level stays built after it was last entered or highlighted
+
 BG_FILL = {
     "spring": "#112218",
     "desert": "#0F0F2B",
     "winter": "#160804"
 }
 
+# audio
+# background music per level, streamed from disk, with the volume each track plays at
+MUSIC = {
+    "spring": (os.path.join(abs_path, "assets", "audio", "bgm", "spring_bgm.mp3"), 0.2),
+    "winter": (os.path.join(abs_path, "assets", "audio", "bgm", "winter_bgm.mp3"), 1),
+    "desert": (os.path.join(abs_path, "assets", "audio", "bgm", "desert_bgm.mp3"), 1)
+}
+MUSIC_FADE = 800 # ms to fade a track out and the next one in
+
+# sound effects share a fixed pool of mixer channels
+VOICE_COUNT = 8
+SOUND_CAPS = {'swing': 3, 'block': 2, 'dash': 1} # instances of each effect that may play at once
+VOICE_PRIORITY = {'player': 1, 'enemy': 0} # a voice can only be stolen by one of equal or higher priority
+HEARING_RANGE = (GAME_WIDTH / 2, GAME_WIDTH * 1.5) # full volume up to the first distance from the view centre, silent past the second
+
+# debug
+SHOW_HITBOXES = False
+
 Z_VALUES = {
     'bg': 0,
     'ground': 1,
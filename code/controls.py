@@ -0,0 +1,30 @@
+from settings import *
+
+GAME_KEYS = (RIGHT_KEY, LEFT_KEY, JUMP_KEY, DASH_KEY, ATTACK_KEY, HEAL_KEY)
+
+def keys_from_mask(mask):
+    return [key for bit, key in enumerate(GAME_KEYS) if mask >> bit & 1]
+
+class Controls:
+    def __init__(self):
+        self.keys = dict.fromkeys(GAME_KEYS, False) # snapshot of the game keys for the current frame
+        self.mask = 0 # the same snapshot packed one bit per game key
+        self.source = None # optional callable returning the keys held this frame, used instead of the keyboard
+        self.record = None # optional bytearray the mask of every polled frame is appended to
+
+    def poll(self):
+        if self.source:
+            held = self.source()
+        else:
+            pressed = pygame.key.get_pressed()
+            held = [key for key in GAME_KEYS if pressed[key]]
+
+        self.mask = 0
+        for bit, key in enumerate(GAME_KEYS):
+            self.keys[key] = key in held
+            self.mask |= self.keys[key] << bit
+
+        if self.record is not None:
+            self.record.append(self.mask)
+
+controls = Controls()
@@ -2,18 +2,22 @@ from abc import ABC, abstractmethod
 
 from constants import *
 
-from timer import Timer
-from sprite import Hitbox, Projectile
+from timer import Timer, scheduler
+from voices import voices
+from utility import silhouette
+from sprite import Projectile
 
 
 class Enemy(pygame.sprite.Sprite, ABC):
-    def __init__(self, pos, hp, groups, collision_sprites, damage_sprites, player, frames, sounds, attack_data):
+    def __init__(self, pos, hp, groups, collision_sprites, damage_sprites, player, frames, sounds, attack_data, rng):
         super().__init__(groups)
         self.player = player
         self.player_pos = player.hitbox_rect.center
+        self.rng = rng # the level's random stream, so runs can be replayed
 
         # animation
-        self.frames, self.frame_index = frames, 0
+        self.animations, self.frame_index = frames, 0
+        self.frames = self.animations[1]
         self.state, self.direction = 'walk', 1
         self.image = self.frames[self.state][self.frame_index]
         self.attack_data = attack_data
@@ -33,6 +37,7 @@ class Enemy(pygame.sprite.Sprite, ABC):
         self.rect = self.image.get_frect(topleft=pos)
         self.hitbox_rect = self.rect.inflate(-72, -32)
         self.prev_rect = self.hitbox_rect.copy()
+        self.prev_pos = None # drawn position at the start of the last step
 
         # movement
         self.gravity = GRAVITY
@@ -106,7 +111,7 @@ class Enemy(pygame.sprite.Sprite, ABC):
             self.velocity.x = self.direction * self.speed
 
     def surface_collisions(self, axis):
-        for sprite in self.collision_sprites:
+        for sprite in self.collision_sprites.nearby(self.hitbox_rect.union(self.prev_rect)):
             if sprite.rect.colliderect(self.hitbox_rect):
                 if axis == 'x': # horizontal
                     if self.hitbox_rect.left <= sprite.rect.right:
@@ -129,10 +134,9 @@ class Enemy(pygame.sprite.Sprite, ABC):
     def check_collisions(self):
         floor_rect_right = pygame.FRect(self.hitbox_rect.bottomright, (-1, 10))
         floor_rect_left = pygame.FRect(self.hitbox_rect.bottomleft, (-1, 10))
-        collide_rects = [sprite.rect for sprite in self.collision_sprites]
 
-        self.collisions["right_edge"] = True if floor_rect_right.collidelist(collide_rects) >= 0 else False
-        self.collisions["left_edge"] = True if floor_rect_left.collidelist(collide_rects) >= 0 else False
+        self.collisions["right_edge"] = self.collision_sprites.collide(floor_rect_right)
+        self.collisions["left_edge"] = self.collision_sprites.collide(floor_rect_left)
 
     def find_player(self):
         player_dist_x = abs(self.hitbox_rect.center[0] - self.player_pos[0])
@@ -146,7 +150,7 @@ class Enemy(pygame.sprite.Sprite, ABC):
             self.can_attack = True
         elif not self.is_attacking:
             self.can_attack = False
-            self.attack_stage = random.choice(self.attack_choice)
+            self.attack_stage = self.rng.choice(self.attack_choice)
 
     # animation
     @abstractmethod
@@ -155,16 +159,13 @@ class Enemy(pygame.sprite.Sprite, ABC):
             self.state = 'fallen'
 
     def animate(self, dt):
-        self.image = self.frames[self.state][int(self.frame_index % len(self.frames[self.state]))]
-        self.image = self.image if self.direction > 0 else pygame.transform.flip(self.image, True, False)
+        facing = 1 if self.direction > 0 else -1
+        self.image = self.animations[facing][self.state][int(self.frame_index % len(self.frames[self.state]))]
         self.frame_index += ANIMATION_SPEED * dt
 
     def hit_flicker(self):
-        if self.timers["hit_cooldown"].active and math.sin(pygame.time.get_ticks() / 32) >= 0:
-            white_mask = pygame.mask.from_surface(self.image)
-            white_surf = white_mask.to_surface()
-            white_surf.set_colorkey('black')
-            self.image = white_surf
+        if self.timers["hit_cooldown"].active and math.sin(scheduler.time / 32) >= 0:
+            self.image = silhouette(self.image)
 
     # combat
     @abstractmethod
@@ -195,7 +196,7 @@ class Enemy(pygame.sprite.Sprite, ABC):
             self.stunned = False
 
     def check_damage(self):
-        damage_rects = [sprite for sprite in self.damage_sprites if sprite.tag == 'player']
+        damage_rects = self.damage_sprites.nearby('player', self.hitbox_rect)
         damaging_hitbox = self.hitbox_rect.collideobjects(damage_rects, key=lambda x: x.rect)
         is_hit = True if damaging_hitbox else False
 
@@ -221,30 +222,24 @@ class Enemy(pygame.sprite.Sprite, ABC):
             self.timers["fallen"].activate()
 
     # update
-    def update_timers(self):
-        for timer in self.timers.values():
-            timer.update()
-
     def update_hitboxes(self):
         if self.timers['attack'].active:
-            Hitbox('enemy',
-                   self.hitbox_rect.center,
-                   self.direction,
-                   self.attack_data[self.state],
-                   self.damage_sprites,
-                   'yellow')
-
-        Hitbox('enemy',
-               self.hitbox_rect.center,
-               self.direction,
-               self.attack_data['contact'],
-               self.damage_sprites,
-               'yellow')
+            self.damage_sprites.spawn('enemy',
+                                      self.hitbox_rect.center,
+                                      self.direction,
+                                      self.attack_data[self.state],
+                                      'yellow')
+
+        self.damage_sprites.spawn('enemy',
+                                  self.hitbox_rect.center,
+                                  self.direction,
+                                  self.attack_data['contact'],
+                                  'yellow')
 
     def update(self, dt):
         self.prev_rect = self.hitbox_rect.copy()
+        self.prev_pos = self.rect.topleft
         self.player_pos = self.player.hitbox_rect.center
-        self.update_timers()
 
         self.check_collisions()
         self.check_damage()
@@ -260,8 +255,8 @@ class Enemy(pygame.sprite.Sprite, ABC):
         self.hit_flicker()
 
 class BasicSwordsman(Enemy):
-    def __init__(self, pos, hp, groups, collision_sprites, damage_sprites, player, frames, sounds, attack_data):
-        super().__init__(pos, hp, groups, collision_sprites, damage_sprites, player, frames, sounds,attack_data)
+    def __init__(self, pos, hp, groups, collision_sprites, damage_sprites, player, frames, sounds, attack_data, rng):
+        super().__init__(pos, hp, groups, collision_sprites, damage_sprites, player, frames, sounds, attack_data, rng)
 
         self.hitbox_rect = self.rect.inflate(-84, -42)
         self.prev_rect = self.hitbox_rect.copy()
@@ -293,7 +288,7 @@ class BasicSwordsman(Enemy):
                 self.timers["combo_cooldown"].deactivate()
                 self.attack_choice = [1, 1, 1, 2]
 
-                if random.randint(0,2) == 1 and self.attack_stage == 1:
+                if self.rng.randint(0,2) == 1 and self.attack_stage == 1:
                     self.attack_choice = [2]
                     self.attack_combo = True
                     self.timers["attack_cooldown"].deactivate()
@@ -301,10 +296,10 @@ class BasicSwordsman(Enemy):
                 else:
                     self.attack_combo = False
 
-                self.attack_stage = random.choice(self.attack_choice)
+                self.attack_stage = self.rng.choice(self.attack_choice)
 
     def counter_attack(self):
-        if random.randint(0, 2) == 1:
+        if self.rng.randint(0, 2) == 1:
             self.attack_stage = 2
             self.attack_combo = True
             self.timers["attack_cooldown"].deactivate()
@@ -325,7 +320,7 @@ class BasicSwordsman(Enemy):
             if int(self.frame_index) + 1 in self.attack_data[self.state]["impact"]:
                 self.timers["attack"].activate()
                 if not self.timers["sound"].active:
-                    self.swing_sound.play()
+                    voices.play(self.swing_sound, self.hitbox_rect.center, VOICE_PRIORITY['enemy'])
                     self.timers["sound"].activate()
         else:
             self.timers["attack"].deactivate()
@@ -333,8 +328,8 @@ class BasicSwordsman(Enemy):
         super().update_hitboxes()
 
 class BossSamurai(Enemy):
-    def __init__(self, pos, hp, groups, collision_sprites, damage_sprites, player, frames, sounds, attack_data):
-        super().__init__(pos, hp, groups, collision_sprites, damage_sprites, player, frames, sounds, attack_data)
+    def __init__(self, pos, hp, groups, collision_sprites, damage_sprites, player, frames, sounds, attack_data, rng):
+        super().__init__(pos, hp, groups, collision_sprites, damage_sprites, player, frames, sounds, attack_data, rng)
 
         self.hitbox_rect = self.rect.inflate(-80, -52)
         self.prev_rect = self.hitbox_rect.copy()
@@ -370,14 +365,14 @@ class BossSamurai(Enemy):
                     self.is_attacking = False
 
                     self.attack_choice = self.base_attack_choice
-                    self.attack_stage = random.choice(self.attack_choice)
+                    self.attack_stage = self.rng.choice(self.attack_choice)
 
     def block(self):
-        if random.randint(0, 4) == 1:
+        if self.rng.randint(0, 4) == 1:
             self.timers["blocking"].activate()
 
     def counter_attack(self):
-        if random.randint(0, 2) == 1:
+        if self.rng.randint(0, 2) == 1:
             self.attack_stage = 3
             self.timers["attack_cooldown"].deactivate()
 
@@ -385,7 +380,7 @@ class BossSamurai(Enemy):
         if self.timers["blocking"].active:
             self.timers["block_duration"].activate()
             self.timers["attack_cooldown"].deactivate()
-            self.block_sound.play()
+            voices.play(self.block_sound, self.hitbox_rect.center, VOICE_PRIORITY['enemy'])
             damage *= 0.5
         super().take_damage(damage)
 
@@ -410,7 +405,7 @@ class BossSamurai(Enemy):
                 self.timers["attack"].activate()
                 self.timers["block_duration"].deactivate()
                 if not self.timers["sound"].active:
-                    self.swing_sound.play()
+                    voices.play(self.swing_sound, self.hitbox_rect.center, VOICE_PRIORITY['enemy'])
                     self.timers["sound"].activate()
         elif self.state == 'block' and self.timers["block_duration"].active:
             self.timers["attack"].activate()
@@ -421,8 +416,8 @@ class BossSamurai(Enemy):
         super().update_hitboxes()
 
 class BossArcher(Enemy):
-    def __init__(self, pos, hp, groups, collision_sprites, damage_sprites, player, frames, sounds, attack_data):
-        super().__init__(pos, hp, groups, collision_sprites, damage_sprites, player, frames, sounds, attack_data)
+    def __init__(self, pos, hp, groups, collision_sprites, damage_sprites, player, frames, sounds, attack_data, rng):
+        super().__init__(pos, hp, groups, collision_sprites, damage_sprites, player, frames, sounds, attack_data, rng)
 
         self.hitbox_rect = self.rect.inflate(-80, -78)
         self.prev_rect = self.hitbox_rect.copy()
@@ -487,7 +482,7 @@ class BossArcher(Enemy):
 
                     self.attack_choice = self.base_attack_choice
                     self.chain_attacks()
-                    self.attack_stage = random.choice(self.attack_choice)
+                    self.attack_stage = self.rng.choice(self.attack_choice)
 
                     self.ammo = self.ammo + 1 if self.ammo < self.max_ammo else self.ammo
                 elif 'shoot' in self.state:
@@ -495,7 +490,7 @@ class BossArcher(Enemy):
                     self.ammo -= 1
 
     def chain_attacks(self):
-        if self.combo_length < self.max_combo_length and random.randint(0, 1) == 1:
+        if self.combo_length < self.max_combo_length and self.rng.randint(0, 1) == 1:
             self.attack_choice = [1, 2]
             self.timers["attack_cooldown"].deactivate()
             self.timers["combo_cooldown"].activate()
@@ -504,8 +499,8 @@ class BossArcher(Enemy):
             self.attack_choice = [3]
 
     def counter_attack(self):
-        if random.randint(0, 3) == 1:
-            self.attack_stage = random.choice([2, 2, 3])
+        if self.rng.randint(0, 3) == 1:
+            self.attack_stage = self.rng.choice([2, 2, 3])
             self.ammo = self.ammo + 1 if self.ammo < self.max_ammo else self.ammo
             self.timers["attack_cooldown"].deactivate()
             self.frame_index = 3
@@ -529,7 +524,7 @@ class BossArcher(Enemy):
             if int(self.frame_index) + 1 in self.attack_data[self.state]["impact"]:
                 self.timers["attack"].activate()
                 if not self.timers["sound"].active:
-                    self.swing_sound.play()
+                    voices.play(self.swing_sound, self.hitbox_rect.center, VOICE_PRIORITY['enemy'])
                     self.timers["sound"].activate()
         elif self.state == "shoot":
             if int(self.frame_index) + 1 in self.attack_data[self.state]["impact"]:
@@ -545,8 +540,8 @@ class BossArcher(Enemy):
                 pos = self.hitbox_rect.center,
                 direction = self.direction,
                 data = self.attack_data[self.state],
-                image = self.frames["arrow"][0],
-                collision_rects = [sprite.rect for sprite in self.collision_sprites],
+                image = self.animations[1 if self.direction > 0 else -1]["arrow"][0],
+                collision_sprites = self.collision_sprites,
                 groups = self.damage_sprites
             )
 
@@ -0,0 +1,178 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1") # sdl's handlers stall worker processes
+
+from multiprocessing import Process, Pipe
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+from constants import *
+from timer import scheduler
+from controls import controls, keys_from_mask
+from simulate import Simulation
+
+PLAYER_FEATURES = 10 # x, y, velocity x, velocity y, hp, dashes, heals, facing, grounded, attacking
+ENEMY_FEATURES = 8 # present, x and y relative to the player, velocity x, velocity y, hp, facing, attacking
+MAX_ENEMIES = 8 # nearest enemies observed, the rest are left out
+OBSERVATION_SIZE = PLAYER_FEATURES + ENEMY_FEATURES * MAX_ENEMIES
+
+FRAME_SCALE = 4
+FRAME_SIZE = (GAME_WIDTH // FRAME_SCALE, GAME_HEIGHT // FRAME_SCALE)
+
+def layout(count, frames):
+    # name, dtype and shape of every array in the shared block, in order
+    arrays = [
+        ('observations', np.float32, (count, OBSERVATION_SIZE)),
+        ('rewards', np.float32, (count,)),
+        ('dones', np.bool_, (count,)),
+        ('actions', np.uint8, (count,))
+    ]
+    if frames:
+        arrays.append(('frames', np.uint8, (count, FRAME_SIZE[1], FRAME_SIZE[0], 3)))
+    return arrays
+
+def map_arrays(buffer, arrays):
+    views, offset = {}, 0
+    for name, dtype, shape in arrays:
+        views[name] = np.ndarray(shape, dtype, buffer, offset)
+        offset += views[name].nbytes
+    return views
+
+class LevelEnv:
+    # one level stepped by action bitmasks over the game keys, observations are written into the given arrays
+    def __init__(self, simulation, stage, observation, frame = None):
+        self.simulation = simulation
+        self.stage = stage
+        self.observation = observation
+        self.frame = frame
+        self.frame_surf = pygame.Surface(FRAME_SIZE) if frame is not None else None
+
+        self.level = None
+        self.seeds = random.Random()
+        self.ticks = 0
+        self.action = 0
+        self.health = (0, 0)
+        controls.source = lambda: keys_from_mask(self.action)
+
+    def totals(self):
+        enemy_hp = sum(max(sprite.hp, 0) for sprite in self.level.attacking_sprites if sprite is not self.level.player)
+        return max(self.level.player.hp, 0), enemy_hp
+
+    def reset(self, seed = None):
+        # a seed restarts the stream every later episode seed is drawn from
+        if seed is not None:
+            self.seeds.seed(seed)
+        self.level = self.simulation.start(self.stage, self.seeds.getrandbits(32))
+        self.ticks = 0
+        self.health = self.totals()
+        self.observe()
+
+    def step(self, action):
+        self.action = action
+        dt = scheduler.advance(STEP)
+        controls.poll()
+        self.level.update(dt)
+        self.ticks += 1
+
+        # damage dealt minus damage taken
+        player_hp, enemy_hp = self.totals()
+        reward = (self.health[1] - enemy_hp) - (self.health[0] - player_hp)
+        self.health = player_hp, enemy_hp
+        done = self.level.status != 'normal' or self.ticks >= MAX_TICKS
+
+        self.observe()
+        return reward, done
+
+    def observe(self):
+        player = self.level.player
+        self.observation[:] = 0
+        self.observation[:PLAYER_FEATURES] = (
+            *player.hitbox_rect.center, *player.velocity, player.hp,
+            player.dash_count, player.heal_count, player.direction,
+            player.colliding['ground'], player.is_attacking
+        )
+
+        enemies = [sprite for sprite in self.level.attacking_sprites if sprite is not player]
+        enemies.sort(key = lambda sprite: math.dist(sprite.hitbox_rect.center, player.hitbox_rect.center))
+        for index, enemy in enumerate(enemies[:MAX_ENEMIES]):
+            start = PLAYER_FEATURES + index * ENEMY_FEATURES
+            self.observation[start:start + ENEMY_FEATURES] = (
+                1, enemy.hitbox_rect.centerx - player.hitbox_rect.centerx, enemy.hitbox_rect.centery - player.hitbox_rect.centery,
+                *enemy.velocity, enemy.hp, enemy.direction, enemy.is_attacking
+            )
+
+        if self.frame is not None:
+            self.level.draw()
+            pygame.transform.smoothscale(MASTER_DISPLAY, FRAME_SIZE, self.frame_surf)
+            self.frame[:] = pygame.surfarray.pixels3d(self.frame_surf).swapaxes(0, 1)
+
+def run_worker(connection, memory_name, arrays, index, stage, frames):
+    # one level per process, the timer scheduler is global to it
+    memory = SharedMemory(memory_name)
+    views = map_arrays(memory.buf, arrays)
+    env = LevelEnv(Simulation(headless = not frames), stage, views['observations'][index], views['frames'][index] if frames else None)
+
+    command = None
+    while command != 'close':
+        command, seed = connection.recv()
+        if command == 'reset':
+            env.reset(seed)
+        elif command == 'step':
+            views['rewards'][index], views['dones'][index] = env.step(int(views['actions'][index]))
+            if views['dones'][index]: # the observation already belongs to the next episode
+                env.reset()
+        connection.send(None)
+
+    env = views = None
+    memory.close()
+
+class VectorEnv:
+    # count levels in worker processes, stepped together, observations are shared rather than pickled
+    def __init__(self, count, stage, frames = False):
+        self.count = count
+        self.arrays = layout(count, frames)
+        self.memory = SharedMemory(create = True, size = sum(np.dtype(dtype).itemsize * math.prod(shape) for _, dtype, shape in self.arrays))
+        self.views = map_arrays(self.memory.buf, self.arrays)
+
+        self.connections = []
+        self.workers = []
+        for index in range(count):
+            connection, worker_connection = Pipe()
+            worker = Process(target = run_worker, args = (worker_connection, self.memory.name, self.arrays, index, stage, frames), daemon = True)
+            worker.start()
+            self.connections.append(connection)
+            self.workers.append(worker)
+
+    @property
+    def observations(self):
+        return self.views['observations']
+
+    @property
+    def frames(self):
+        return self.views.get('frames')
+
+    def command(self, command, seeds):
+        for connection, seed in zip(self.connections, seeds):
+            connection.send((command, seed))
+        for connection in self.connections:
+            connection.recv()
+
+    def reset(self, seed = 0):
+        # env i draws its episode seeds from seed + i
+        self.command('reset', [seed + index for index in range(self.count)])
+        return self.observations
+
+    def step(self, actions):
+        # the returned arrays are overwritten by the next step, copy what has to be kept
+        self.views['actions'][:] = actions
+        self.command('step', [None] * self.count)
+        return self.observations, self.views['rewards'], self.views['dones']
+
+    def close(self):
+        self.command('close', [None] * self.count)
+        for worker in self.workers:
+            worker.join()
+        self.views = None
+        self.memory.close()
+        self.memory.unlink()
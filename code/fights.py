@@ -0,0 +1,130 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1") # sdl's handlers stall pool workers and swallow terminate
+
+import argparse, json
+from multiprocessing import Pool, cpu_count
+from statistics import mean
+from time import perf_counter
+
+from constants import *
+from simulate import Simulation
+from benchmark import fight_keys, place_player
+
+BOSSES = {
+    'samurai': 'winter',
+    'archer': 'desert'
+}
+
+simulation = None # one per worker process, assets and maps are loaded once and reused by every fight
+
+def init_worker(stages):
+    global simulation
+    simulation = Simulation()
+    for stage in stages:
+        simulation.get_stage(stage)
+
+def track(player, boss):
+    # counts on the instances, the game code stays untouched
+    stats = {'damage_taken': 0, 'hits': 0, 'blocked': 0}
+    player_damage, boss_damage = player.take_damage, boss.take_damage
+
+    def take_player_damage(damage):
+        stats['damage_taken'] += damage
+        player_damage(damage)
+
+    def take_boss_damage(damage):
+        stats['hits'] += 1
+        if 'blocking' in boss.timers and boss.timers['blocking'].active:
+            stats['blocked'] += 1
+        boss_damage(damage)
+
+    player.take_damage = take_player_damage
+    boss.take_damage = take_boss_damage
+    return stats
+
+def fight(job):
+    boss_name, variant, attack_data, seed = job
+    simulation.attack_impact_frames = attack_data
+    level = simulation.start(BOSSES[boss_name], seed)
+
+    # the boss alone against the scripted player, starting just out of reach
+    boss = level.boss
+    for sprite in level.attacking_sprites.sprites():
+        if sprite not in (level.player, boss):
+            sprite.kill()
+    place_player(level, (boss.hitbox_rect.centerx - 80, boss.hitbox_rect.bottom - 10))
+    stats = track(level.player, boss)
+
+    ticks, elapsed = simulation.simulate(level, MAX_TICKS, fight_keys, lambda level: boss.hp <= 0)
+    return {
+        'boss': boss_name,
+        'variant': variant,
+        'seed': seed,
+        'won': boss.hp <= 0 and not level.player.fallen,
+        'ticks': ticks,
+        'seconds': ticks / FPS,
+        'cpu_seconds': elapsed,
+        **stats
+    }
+
+def aggregate(results):
+    fights = {}
+    for result in results:
+        fights.setdefault(f"{result['boss']}/{result['variant']}", []).append(result)
+
+    summary = {}
+    for name, runs in sorted(fights.items()):
+        wins = [run for run in runs if run['won']]
+        summary[name] = {
+            'fights': len(runs),
+            'win_rate': len(wins) / len(runs),
+            'time_to_kill_s': mean(run['seconds'] for run in wins) if wins else None,
+            'damage_taken': mean(run['damage_taken'] for run in runs),
+            'hits': mean(run['hits'] for run in runs),
+            'blocked': mean(run['blocked'] for run in runs)
+        }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description = "Run many headless boss fights across a process pool and aggregate the outcomes.")
+    parser.add_argument('bosses', nargs = '*', default = list(BOSSES), help = f"bosses to fight out of {', '.join(BOSSES)}, all by default")
+    parser.add_argument('--seeds', type = int, default = 50, help = "fights per boss and tuning table, seeded 0 to seeds - 1")
+    parser.add_argument('--attack-data', nargs = '+', default = [os.path.join(abs_path, "data", "json", "attack_data.json")], help = "attack_data.json variants to compare")
+    parser.add_argument('--workers', type = int, default = cpu_count(), help = "worker processes, one per core by default")
+    parser.add_argument('--output', help = "write the summary and every fight as json to this file")
+    args = parser.parse_args()
+    for boss in args.bosses:
+        if boss not in BOSSES:
+            parser.error(f"unknown boss {boss}")
+
+    variants = {}
+    for path in args.attack_data:
+        with open(path) as jsonf:
+            variants[os.path.relpath(path)] = json.load(jsonf) # same named variants from different folders stay apart
+
+    jobs = [(boss, variant, attack_data, seed) for boss in args.bosses for variant, attack_data in variants.items() for seed in range(args.seeds)]
+    stages = {BOSSES[boss] for boss in args.bosses}
+
+    start = perf_counter()
+    with Pool(args.workers, init_worker, (stages,)) as pool:
+        results = list(pool.imap_unordered(fight, jobs, chunksize = max(len(jobs) // (args.workers * 4), 1)))
+    elapsed = perf_counter() - start
+
+    report = {
+        'summary': aggregate(results),
+        'fights': len(results),
+        'workers': args.workers,
+        'seconds': elapsed,
+        'fights_per_minute': len(results) / elapsed * 60
+    }
+    print(json.dumps(report, indent = 2))
+
+    if args.output:
+        report['results'] = sorted(results, key = lambda x: (x['boss'], x['variant'], x['seed']))
+        with open(args.output, 'w') as jsonf:
+            json.dump(report, jsonf, indent = 2)
+
+if __name__ == "__main__":
+    main()
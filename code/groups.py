@@ -1,44 +1,126 @@
 from constants import *
+from sprite import Hitbox
+from utility import desaturate
 
-class CameraLockedSprites(pygame.sprite.Group):
-    def __init__(self, width, height):
+def grid_cells(rect, cell_size = TILE_SIZE):
+    left, right = sorted((rect.left, rect.right))
+    top, bottom = sorted((rect.top, rect.bottom))
+    for y in range(int(top // cell_size), int(bottom // cell_size) + 1):
+        for x in range(int(left // cell_size), int(right // cell_size) + 1):
+            yield x, y
+
+class LayeredSprites(pygame.sprite.Group):
+    def __init__(self):
         super().__init__()
-        self.offset = vector(0,0)
-        self.width, self.height = width, height
+        self.layers = {} # z -> sprites in insertion order
+        self.layer_order = []
+        self.sprite_layers = {}
+        self.pending = {} # sprites are bucketed on the next draw since z is set after joining a group
 
-    def handle_offset(self, target_pos):
-        self.offset.x = -(target_pos[0] - GAME_WIDTH / 2)
-        self.offset.y = -(target_pos[1] - GAME_HEIGHT / 2)
+    def add_internal(self, sprite, layer = None):
+        super().add_internal(sprite, layer)
+        self.pending[sprite] = None
 
-    def camera_constraint(self):
-        self.offset.x = self.offset.x if self.offset.x < 0 else 0
-        self.offset.x = self.offset.x if self.offset.x > -self.width + GAME_WIDTH else -self.width + GAME_WIDTH
-        self.offset.y = self.offset.y if self.offset.y > -self.height + GAME_HEIGHT else -self.height + GAME_HEIGHT
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        if sprite in self.pending:
+            del self.pending[sprite]
+        else:
+            z = self.sprite_layers.pop(sprite)
+            del self.layers[z][sprite]
+            if not self.layers[z]:
+                del self.layers[z]
+                self.layer_order.remove(z)
 
-    def update_offset(self, target_pos):
-        self.handle_offset(target_pos)
-        self.camera_constraint()
+    def layered(self):
+        for sprite in self.pending:
+            if sprite.z not in self.layers:
+                self.layers[sprite.z] = {}
+                self.layer_order = sorted(self.layers)
+            self.layers[sprite.z][sprite] = None
+            self.sprite_layers[sprite] = sprite.z
+        self.pending.clear()
 
-    def draw(self, surface, target_pos):
-        self.update_offset(target_pos)
+        for z in self.layer_order:
+            yield from self.layers[z]
 
-class AllSprites(CameraLockedSprites):
-    def __init__(self, width, height, bg_tiles, colour):
-        super().__init__(width, height)
-        self.bg_tiles = [pygame.transform.scale(tile, (GAME_WIDTH, GAME_HEIGHT)) for tile in bg_tiles]
-        self.colour = colour
+class CameraLockedSprites(pygame.sprite.Group):
+    def __init__(self, camera):
+        super().__init__()
+        self.camera = camera
+
+    @property
+    def offset(self):
+        return self.camera.offset
+
+    def render_pos(self, sprite, alpha):
+        # blends moving sprites back towards where their last step started, exact at alpha 1
+        x, y = sprite.rect.topleft
+        if sprite.prev_pos and alpha < 1:
+            prev_x, prev_y = sprite.prev_pos
+            x += (prev_x - x) * (1 - alpha)
+            y += (prev_y - y) * (1 - alpha)
+        return x + self.offset.x, y + self.offset.y
+
+class AllSprites(CameraLockedSprites, LayeredSprites):
+    def __init__(self, camera, bg_tiles, colour):
+        super().__init__(camera)
+        # parallax layers wrap horizontally and have the desaturation baked in
+        self.bg_tiles = [desaturate(pygame.transform.scale(tile, (GAME_WIDTH, GAME_HEIGHT))) for tile in bg_tiles]
+        self.colour = pygame.Color(colour).lerp('white', 50 / 255)
         self.tile_width = GAME_WIDTH
-        self.tiles = 5
 
-        self.desaturate_surf = pygame.Surface((GAME_WIDTH, GAME_HEIGHT), pygame.SRCALPHA)
-        self.desaturate_surf.fill((255, 255, 255, 50))
+        # static tile layers baked into screen-width column chunks
+        self.chunk_width = GAME_WIDTH
+        self.chunk_count = math.ceil(camera.width / self.chunk_width)
+        self.static_layers = {}
+        self.static_order = []
+        self.chunk_totals = {}
+
+    def bake_layer(self, tiles, z):
+        if z not in self.static_layers:
+            self.static_layers[z] = [None] * self.chunk_count
+            self.static_order = sorted(self.static_layers)
+        chunks = self.static_layers[z]
+        camera_height = self.camera.height
+        for x, y, surf in tiles:
+            rect = surf.get_rect(topleft=(x * TILE_SIZE, y * TILE_SIZE))
+            first = max(rect.left // self.chunk_width, 0)
+            last = min((rect.right - 1) // self.chunk_width, self.chunk_count - 1)
+            for index in range(first, last + 1):
+                if not chunks[index]:
+                    chunks[index] = pygame.Surface((self.chunk_width, camera_height), pygame.SRCALPHA)
+                chunks[index].blit(surf, (rect.x - index * self.chunk_width, rect.y))
+        self.chunk_totals[z] = len([chunk for chunk in chunks if chunk])
+
+    def draw_layer(self, surface, z):
+        chunks = self.static_layers[z]
+        first = max(int(self.camera.view_rect.left) // self.chunk_width, 0)
+        last = min(int(self.camera.view_rect.right) // self.chunk_width, self.chunk_count - 1)
+        # floored once so chunks land on the same pixels the per tile blits used to
+        x, y = math.floor(self.offset.x), math.floor(self.offset.y)
+        drawn = 0
+        for index in range(first, last + 1):
+            if chunks[index]:
+                drawn += 1
+                surface.blit(chunks[index], (index * self.chunk_width + x, y))
+        self.camera.drawn += drawn
+        self.camera.culled += self.chunk_totals[z] - drawn
+
+    def empty(self):
+        super().empty()
+        self.static_layers = {}
+        self.static_order = []
+        self.chunk_totals = {}
 
     def draw_bg(self, surface):
-        for tile in range(self.tiles):
-            for i in range(len(self.bg_tiles)):
-                bg = self.bg_tiles[i]
+        for i in range(len(self.bg_tiles)):
+            bg = self.bg_tiles[i]
+            shift = self.offset.x * (i / 25)
+            first = int(-shift // self.tile_width) # only the two repeats overlapping the screen are drawn
+            for tile in (first, first + 1):
                 surface.blit(bg, (
-                        self.tile_width * tile + (self.offset.x * (i / 25)),
+                        self.tile_width * tile + shift,
                         (self.offset.y * (i / 25)) - 5
                     )
                 )
@@ -46,41 +128,135 @@ class AllSprites(CameraLockedSprites):
         bottom = (self.offset.y * ((len(self.bg_tiles) - 1) / 25)) - 5 + GAME_HEIGHT
         fill = pygame.rect.FRect(0, bottom, GAME_WIDTH, GAME_HEIGHT)
         pygame.draw.rect(surface, self.colour, fill)
-        surface.blit(self.desaturate_surf, (0, 0))
 
 
-    def draw(self, surface, target_pos):
-        super().draw(surface, target_pos)
+    def draw(self, surface, alpha = 1):
         self.draw_bg(surface)
-        for sprite in sorted(self.sprites(), key = lambda x: x.z):
-            offset_pos = sprite.rect.topleft + self.offset
-            surface.blit(sprite.image, offset_pos)
+
+        layers = self.static_order.copy()
+        for sprite in self.layered():
+            while layers and layers[0] <= sprite.z:
+                self.draw_layer(surface, layers.pop(0))
+            if not self.camera.visible(sprite.rect):
+                continue
+            surface.blit(sprite.image, self.render_pos(sprite, alpha))
+        for z in layers:
+            self.draw_layer(surface, z)
 
 class TextSprites(CameraLockedSprites):
-    def __init__(self, width, height):
-        super().__init__(width, height)
+    def __init__(self, camera):
+        super().__init__(camera)
+        self.columns = None # signs bucketed by screen-width column, rebuilt lazily after the group changes
 
-    def draw(self, surface, target_pos):
-        super().draw(surface, target_pos)
+    def add_internal(self, sprite, layer = None):
+        super().add_internal(sprite, layer)
+        self.columns = None
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.columns = None
+
+    def build_columns(self):
+        self.columns = {}
         for sprite in self:
-            sprite.draw(surface, self.offset)
+            for column in range(int(sprite.rect.left // GAME_WIDTH), int(sprite.rect.right // GAME_WIDTH) + 1):
+                self.columns.setdefault(column, {})[sprite] = None
+
+    def draw(self, surface):
+        if self.columns is None:
+            self.build_columns()
+
+        view_rect = self.camera.view_rect
+        candidates = {}
+        for column in range(int(view_rect.left // GAME_WIDTH), int(view_rect.right // GAME_WIDTH) + 1):
+            candidates.update(self.columns.get(column, {}))
+
+        self.camera.culled += len(self) - len(candidates)
+        for sprite in candidates:
+            if self.camera.visible(sprite.rect):
+                sprite.draw(surface, self.offset)
 
 class HitboxSprites(CameraLockedSprites):
-    def __init__(self, width, height):
-        super().__init__(width, height)
+    def __init__(self, camera):
+        super().__init__(camera)
+        self.pool = [] # released hitboxes, reused by spawn
 
-    def empty(self):
+        # spatial hash per tag, rebuilt once per tick
+        self.cell_size = TILE_SIZE * 4
+        self.broadphase = {}
+        self.order = {}
+
+    def spawn(self, tag, pos, direction, data, colour = 'red'):
+        if not self.pool:
+            return Hitbox(tag, pos, direction, data, self, colour)
+
+        hitbox = self.pool.pop()
+        hitbox.colour = colour
+        hitbox.reset(tag, pos, direction, data)
+        self.add_internal(hitbox)
+        hitbox.add_internal(self)
+        return hitbox
+
+    def empty(self, sustained = False):
+        # projectiles outlive a step but not a reset, only plain hitboxes go back to the pool
         for sprite in self.sprites():
             if not sprite.sustained:
                 self.remove_internal(sprite)
                 sprite.remove_internal(self)
+                self.pool.append(sprite)
+            elif sustained:
+                sprite.kill()
 
-    def draw(self, surface, target_pos):
-        super().draw(surface, target_pos)
+    def build_broadphase(self):
+        self.broadphase = {}
+        self.order = {}
+        for index, sprite in enumerate(self):
+            self.order[sprite] = index
+            cells = self.broadphase.setdefault(sprite.tag, {})
+            for cell in grid_cells(sprite.rect, self.cell_size):
+                cells.setdefault(cell, []).append(sprite)
+
+    def nearby(self, tag, rect):
+        cells = self.broadphase.get(tag, {})
+        sprites = {sprite for cell in grid_cells(rect, self.cell_size) for sprite in cells.get(cell, ())}
+        return sorted(sprites, key = self.order.get) # keep group order so the first hit matches a full scan
+
+    def draw(self, surface, alpha = 1):
         for sprite in self:
-            if sprite.visible:
-                offset_pos = sprite.rect.topleft + self.offset
-                surface.blit(sprite.image, offset_pos)
+            if sprite.visible and self.camera.visible(sprite.rect):
+                surface.blit(sprite.image, self.render_pos(sprite, alpha))
+
+class CollisionSprites(pygame.sprite.Group):
+    def __init__(self):
+        super().__init__()
+        self.grid = None # solid tile occupancy, rebuilt lazily after the group changes
+        self.order = {}
+
+    def add_internal(self, sprite, layer = None):
+        super().add_internal(sprite, layer)
+        self.grid = None
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.grid = None
+
+    def build_grid(self):
+        self.grid = {}
+        self.order = {}
+        for index, sprite in enumerate(self):
+            self.order[sprite] = index
+            for cell in grid_cells(sprite.rect):
+                self.grid.setdefault(cell, []).append(sprite)
+
+    def nearby(self, rect):
+        if self.grid is None:
+            self.build_grid()
+
+        sprites = {sprite for cell in grid_cells(rect) for sprite in self.grid.get(cell, ())}
+        return sorted(sprites, key = self.order.get) # keep group order so resolution matches a full scan
+
+    def collide(self, rect):
+        return rect.collidelist([sprite.rect for sprite in self.nearby(rect)]) >= 0
 
 class AttackingSprites(pygame.sprite.Group):
     def __init__(self):
@@ -97,29 +273,26 @@ class UISprites(pygame.sprite.Group):
         super().__init__()
 
     def draw(self, surface):
-        for sprite in [sprite for sprite in self if sprite.visible]:
-            surface.blit(sprite.image, sprite.rect.topleft)
+        for sprite in self:
+            if sprite.visible:
+                surface.blit(sprite.image, sprite.rect.topleft)
 
-class MenuSprites(pygame.sprite.Group):
+class MenuSprites(LayeredSprites):
     def __init__(self):
         super().__init__()
 
     def draw(self, surface):
-        for sprite in sorted(self.sprites(), key = lambda x: x.z):
+        for sprite in self.layered():
             surface.blit(sprite.image, sprite.rect)
 
-class ParallaxSprites(CameraLockedSprites):
-    def __init__(self):
-        super().__init__(GAME_WIDTH, GAME_HEIGHT)
+class ParallaxSprites(CameraLockedSprites, LayeredSprites):
+    def __init__(self, camera):
+        super().__init__(camera)
         self.tile_width = GAME_WIDTH
 
-        self.desaturate_surf = pygame.Surface((GAME_WIDTH, GAME_HEIGHT), pygame.SRCALPHA)
-        self.desaturate_surf.fill((255, 255, 255, 50))
-
     def draw(self, surface, target_pos):
-        self.handle_offset(target_pos)
-        for sprite in sorted(self.sprites(), key=lambda x: x.z):
+        self.camera.handle_offset(target_pos)
+        for sprite in self.layered():
             speed = sprite.z / 50
             offset_pos = (self.offset.x * speed - 20, self.offset.y * speed - 10)
             surface.blit(sprite.image, offset_pos)
-            surface.blit(self.desaturate_surf, (0, 0))
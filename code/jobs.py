@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+class Job:
+    # decode runs on a worker thread with the results of the jobs it needs, finish on the main thread with what decode returned
+    def __init__(self, name, decode, finish = None, needs = ()):
+        self.name = name
+        self.decode = decode
+        self.finish = finish
+        self.needs = needs
+
+def run_jobs(jobs, progress = None, workers = None):
+    # results by job name, progress is called with the finished and total job counts after every job
+    results = {}
+    waiting = list(jobs)
+    running = {}
+    with ThreadPoolExecutor(workers) as pool:
+        while waiting or running:
+            for job in [job for job in waiting if all(name in results for name in job.needs)]:
+                waiting.remove(job)
+                running[pool.submit(job.decode, *(results[name] for name in job.needs))] = job
+            if not running:
+                raise ValueError(f"jobs wait on missing or circular needs: {', '.join(job.name for job in waiting)}")
+
+            done, _ = wait(running, return_when = FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                results[job.name] = job.finish(future.result()) if job.finish else future.result()
+                if progress:
+                    progress(len(results), len(jobs))
+    return results
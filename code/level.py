@@ -1,24 +1,35 @@
 from constants import *
+from timer import scheduler
 from text import TEXT_TAGS
 
+from camera import Camera
+
 from sprite import Sprite, Transition
 from player import Player
 from enemies import BasicSwordsman, BossSamurai, BossArcher
-from groups import AllSprites, AttackingSprites, HitboxSprites, UISprites, TextSprites
+from groups import AllSprites, AttackingSprites, CollisionSprites, HitboxSprites, UISprites, TextSprites
 from ui import HealthBar, CounterToken, Counter, Text
 
 class Level:
-    def __init__(self, name, tmx_map, ui_frames, level_frames, audio_files, player_frames, attack_impact_frames):
+    def __init__(self, name, tmx_map, ui_frames, level_frames, audio_files, player_frames, attack_impact_frames, headless = False):
         self.display_surf = MASTER_DISPLAY
         self.name = name
+        self.headless = headless # simulation only, nothing is baked, drawn or shown on the hud
 
         # entities
         self.player = None
         self.boss = None
         self.boss_health_bar = None
 
+        # hud
+        self.health_bar = None
+        self.heal_counter = None
+        self.dash_tokens = []
+
         # properties
         self.status = "normal"
+        self.seed = None
+        self.rng = None
         self.level_width = tmx_map.width * TILE_SIZE
         self.level_height = tmx_map.height * TILE_SIZE
         self.level_properties = tmx_map.get_layer_by_name("data").properties
@@ -26,36 +37,37 @@ class Level:
         fill_colour = BG_FILL[self.level_properties["bg"]]
 
         # groups
-        self.all_sprites = AllSprites(self.level_width, self.level_height, bg_tiles, fill_colour)
+        self.camera = Camera(self.level_width, self.level_height)
+        self.all_sprites = AllSprites(self.camera, bg_tiles, fill_colour)
         self.ui_sprites = UISprites()
-        self.collision_sprites = pygame.sprite.Group()
-        self.text_sprites = TextSprites(self.level_width, self.level_height,)
+        self.collision_sprites = CollisionSprites()
+        self.text_sprites = TextSprites(self.camera)
 
         self.attacking_sprites = AttackingSprites()
-        self.damage_sprites = HitboxSprites(self.level_width, self.level_height)
+        self.damage_sprites = HitboxSprites(self.camera)
 
         # setup
         self.ui_frames = ui_frames
         self.reset(tmx_map, level_frames, audio_files, player_frames, attack_impact_frames)
 
         # transitions
-        self.out_transition = Transition(1000, 255, groups=self.all_sprites)
-        self.in_transition = Transition(2000, 0, groups=self.all_sprites)
+        with scheduler.owning(self):
+            self.out_transition = Transition(1000, 255, groups=self.all_sprites, headless=self.headless)
+            self.in_transition = Transition(2000, 0, groups=self.all_sprites, headless=self.headless)
 
         # sound
 
     def setup(self, tmx_map, level_frames, audio_files, player_frames, attack_impact_frames):
         for x, y, surf in tmx_map.get_layer_by_name("ground").tiles():
-            Sprite((x * TILE_SIZE, y * TILE_SIZE), surf, (self.all_sprites, self.collision_sprites), Z_VALUES['ground'])
+            Sprite((x * TILE_SIZE, y * TILE_SIZE), surf, self.collision_sprites, Z_VALUES['ground'])
 
         for x, y, surf in tmx_map.get_layer_by_name("barrier").tiles():
             Sprite((x * TILE_SIZE, y * TILE_SIZE), surf, self.collision_sprites)
 
-        for x, y, surf in tmx_map.get_layer_by_name("fg").tiles():
-            Sprite((x * TILE_SIZE, y * TILE_SIZE), surf, self.all_sprites, Z_VALUES['fg'])
-
-        for x, y, surf in tmx_map.get_layer_by_name("bg").tiles():
-            Sprite((x * TILE_SIZE, y * TILE_SIZE), surf, self.all_sprites, Z_VALUES['bg'])
+        # static layers are drawn from pre-rendered chunks instead of per tile sprites
+        if not self.headless:
+            for layer in ['bg', 'ground', 'fg']:
+                self.all_sprites.bake_layer(tmx_map.get_layer_by_name(layer).tiles(), Z_VALUES[layer])
 
         for obj in tmx_map.get_layer_by_name("player"):
             self.player = Player(
@@ -88,7 +100,8 @@ class Level:
                     player = self.player,
                     frames = level_frames[obj.name],
                     sounds = audio_files,
-                    attack_data = attack_impact_frames["basic"]
+                    attack_data = attack_impact_frames["basic"],
+                    rng = self.rng
                 )
             elif obj.name == 'samurai':
                 self.boss = BossSamurai(
@@ -100,9 +113,11 @@ class Level:
                     player = self.player,
                     frames = level_frames[obj.name],
                     sounds = audio_files,
-                    attack_data = attack_impact_frames[obj.name]
+                    attack_data = attack_impact_frames[obj.name],
+                    rng = self.rng
                 )
-                self.boss_health_bar = HealthBar((29, 20), obj.hp, self.ui_sprites, self.ui_frames[obj.name])
+                if not self.headless:
+                    self.boss_health_bar = HealthBar((29, 20), obj.hp, self.ui_sprites, self.ui_frames[obj.name])
             elif obj.name == 'archer':
                 self.boss = BossArcher(
                     pos = (obj.x, obj.y),
@@ -113,38 +128,49 @@ class Level:
                     player = self.player,
                     frames = level_frames[obj.name],
                     sounds = audio_files,
-                    attack_data = attack_impact_frames[obj.name]
+                    attack_data = attack_impact_frames[obj.name],
+                    rng = self.rng
                 )
-                self.boss_health_bar = HealthBar((29, 20), obj.hp, self.ui_sprites, self.ui_frames[obj.name])
-
-        HealthBar((10, 190), PlAYER_HEALTH, self.ui_sprites, self.ui_frames['player'])
-        Counter((10, 215), self.ui_frames['player']['heal'], self.ui_frames['player']['heal_frame'], self.player.max_heal, self.ui_sprites)
+                if not self.headless:
+                    self.boss_health_bar = HealthBar((29, 20), obj.hp, self.ui_sprites, self.ui_frames[obj.name])
+
+        # hud
+        if self.headless:
+            return
+        self.health_bar = HealthBar((10, 190), PlAYER_HEALTH, self.ui_sprites, self.ui_frames['player'])
+        self.heal_counter = Counter((10, 215), self.ui_frames['player']['heal'], self.ui_frames['player']['heal_frame'], self.player.max_heal, self.ui_sprites)
+        self.dash_tokens = [
+            CounterToken((50, 215), count, self.ui_frames['player']['dash'], self.player.max_dash_count, self.ui_sprites)
+            for count in range(self.player.max_dash_count)
+        ]
 
-    def reset(self, tmx_map, level_frames, audio_files, player_frames, attack_impact_frames):
+    def reset(self, tmx_map, level_frames, audio_files, player_frames, attack_impact_frames, seed = None):
+        scheduler.drop(self)
         self.all_sprites.empty()
         self.ui_sprites.empty()
         self.collision_sprites.empty()
         self.text_sprites.empty()
         self.attacking_sprites.empty()
-        self.damage_sprites.empty()
-
-        self.in_transition = Transition(2000, 0, groups=self.all_sprites)
+        self.damage_sprites.empty(sustained = True)
 
         self.boss = None
         self.boss_health_bar = None
         self.status = "normal"
-        self.setup(tmx_map, level_frames, audio_files, player_frames, attack_impact_frames)
+        self.camera_target = None
+
+        # every attempt draws a fresh seed unless one is given to repeat a run
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        with scheduler.owning(self):
+            self.in_transition = Transition(2000, 0, groups=self.all_sprites, headless=self.headless)
+            self.setup(tmx_map, level_frames, audio_files, player_frames, attack_impact_frames)
 
     def update_ui(self, dt):
-        for sprite in self.ui_sprites:
-            if not sprite.sustained:
-                sprite.kill()
-            else:
-                sprite.update(
-                    hp = self.player.hp,
-                    count = self.player.heal_count,
-                    dt = dt
-                )
+        # widgets only re-render when their values or animation frame change
+        self.health_bar.update(hp = self.player.hp)
+        self.heal_counter.update(count = self.player.heal_count, dt = dt)
+        for token in self.dash_tokens:
+            token.update(count = self.player.dash_count)
 
         if self.boss:
             self.boss_health_bar.update(hp = self.boss.hp)
@@ -153,31 +179,42 @@ class Level:
             else:
                 self.boss_health_bar.visible = False
 
-        for count in range(self.player.dash_count):
-            CounterToken((50, 215), count, self.ui_frames['player']['dash'], self.player.max_dash_count, self.ui_sprites)
-
     def check_status(self):
         if not len(self.damage_sprites) and not self.player.fallen:
             self.status = 'complete'
         elif self.player.fallen:
             self.status = 'fail'
 
-    def run(self, dt):
+    def update(self, dt):
         self.damage_sprites.empty()
+        self.camera_target = self.player.camera_rect.center
 
-        # update
         if self.status == 'normal':
-            self.attacking_sprites.update()
-            self.damage_sprites.update(dt)
-            self.all_sprites.update(dt)
-        self.update_ui(dt)
+            with scheduler.owning(self): # projectiles start timers mid attempt
+                self.attacking_sprites.update()
+                self.damage_sprites.update(dt)
+                self.damage_sprites.build_broadphase()
+                self.all_sprites.update(dt)
+        if not self.headless:
+            self.update_ui(dt)
         self.check_status()
 
-        # draw
-        self.all_sprites.draw(self.display_surf, self.player.camera_rect.center)
-        self.damage_sprites.draw(self.display_surf, self.player.camera_rect.center)
+    def draw(self, alpha = 1):
+        # alpha is how far the render falls between the last two simulation steps
+        x, y = self.player.camera_rect.center
+        if self.camera_target and alpha < 1:
+            x += (self.camera_target[0] - x) * (1 - alpha)
+            y += (self.camera_target[1] - y) * (1 - alpha)
+        self.camera.update((x, y))
+
+        self.all_sprites.draw(self.display_surf, alpha)
+        self.damage_sprites.draw(self.display_surf, alpha)
         self.ui_sprites.draw(self.display_surf)
-        self.text_sprites.draw(self.display_surf, self.player.camera_rect.center)
+        self.text_sprites.draw(self.display_surf)
 
         self.in_transition.draw(self.display_surf)
         self.out_transition.draw(self.display_surf)
+
+    def run(self, dt):
+        self.update(dt)
+        self.draw()
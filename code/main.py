@@ -1,93 +1,209 @@
-import json
-from pytmx.util_pygame import load_pygame
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 from constants import *
-from utility import import_subfolders
+from utility import load_atlas_index, decode_subfolders, convert_subfolders, flip_frames, import_json, render_text
 from debug import debug
-from timer import Timer
+from timer import Timer, scheduler
+from presenter import presenter
+from music import music
+from voices import voices
+from jobs import Job, run_jobs
+from controls import controls
+from replay import Replay
+from baked import load_map
 
 from level import Level
 from menu import MainMenu
 
 class Game:
-    def __init__(self):
+    def __init__(self, record = None):
         pygame.init()
-        self.display = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.FULLSCREEN |pygame.SCALED, vsync=1)
-        self.display_surf = MASTER_DISPLAY
+        self.display = presenter.setup()
         pygame.display.set_caption("Blade Hymn")
 
+        self.loading_drawn = -math.inf # ticks the loading screen was last presented
+        self.setup(record = record, progress = self.draw_loading)
+        voices.setup(self.audio_files)
+
+        self.stages["main_menu"] = MainMenu(self.level_frames["bg_tiles"], self.ui_frames)
+        self.set_stage("main_menu")
+
+    def setup(self, record = None, headless = False, audio = True, progress = None):
+        # everything but the window, menu and sound channels, shared with simulations
+        self.display_surf = MASTER_DISPLAY
         self.clock = pygame.time.Clock()
         self.quit_timer = Timer(2000)
 
+        # replays
+        self.record_dir = record # every level attempt is saved here when set
+        self.recording = None
+
         # assets
         self.level_frames = {}
         self.player_frames = {}
         self.ui_frames = {}
         self.attack_impact_frames = {}
         self.audio_files = {}
+        self.import_assets(audio, progress)
 
-        self.import_assets()
-
-        # level data
-        self.tmx_data = {
-            'test': load_pygame(os.path.join(abs_path, "data", "tmx", "testmap.tmx")),
-            'spring': load_pygame(os.path.join(abs_path, "data", "tmx", "spring.tmx")),
-            'winter': load_pygame(os.path.join(abs_path, "data", "tmx", "winter.tmx")),
-            'desert': load_pygame(os.path.join(abs_path, "data", "tmx", "desert.tmx"))
-        }
+        # levels are built on demand, the map highlighted in the menu is loaded in the background
+        self.tmx_data = {}
+        self.headless = headless # levels skip drawing and the hud
+        self.loader = ThreadPoolExecutor(max_workers = 1)
+        self.pending = {} # level name -> future of the map being loaded
+        self.last_visit = {} # level name -> ticks when it was last entered or highlighted
 
         self.current_stage = None
-        self.stages = {
-            "main_menu": MainMenu(self.level_frames["bg_tiles"], self.ui_frames, self.audio_files),
-            "test": Level('test', self.tmx_data['test'], self.ui_frames, self.level_frames, self.audio_files, self.player_frames, self.attack_impact_frames),
-            "spring": Level('spring', self.tmx_data['spring'], self.ui_frames, self.level_frames, self.audio_files, self.player_frames, self.attack_impact_frames),
-            "winter": Level('winter', self.tmx_data['winter'], self.ui_frames, self.level_frames, self.audio_files, self.player_frames,self.attack_impact_frames),
-            "desert": Level('desert', self.tmx_data['desert'], self.ui_frames, self.level_frames, self.audio_files,self.player_frames, self.attack_impact_frames)
+        self.stages = {}
+
+    def asset_jobs(self, audio = True):
+        # decoding runs on worker threads, only the conversions that need the display run on the main thread
+        animations = {
+            "sbasic": ("assets", "graphics", "enemies", "sbasic"),
+            "wbasic": ("assets", "graphics", "enemies", "wbasic"),
+            "dbasic": ("assets", "graphics", "enemies", "dbasic"),
+            "samurai": ("assets", "graphics", "enemies", "bossSamurai"),
+            "archer": ("assets", "graphics", "enemies", "bossArcher"),
+            "player": ("assets", "graphics", "player")
+        }
+        frames = {
+            "bg_tiles": ("assets", "graphics", "background"),
+            "ui_player": ("assets", "graphics", "ui", "player"),
+            "ui_archer": ("assets", "graphics", "ui", "bossArcher"),
+            "ui_samurai": ("assets", "graphics", "ui", "bossSamurai"),
+            "ui_menu": ("assets", "graphics", "ui", "menu")
+        }
+        sounds = {
+            "dash": ("assets", "audio", "effects", "dash.wav"),
+            "swing": ("assets", "audio", "effects", "swing.wav"),
+            "block": ("assets", "audio", "effects", "block.wav")
         }
 
-        self.set_stage("main_menu")
+        jobs = [
+            Job("atlas_index", load_atlas_index),
+            Job("attack_data", partial(import_json, "data", "json", "attack_data.json"))
+        ]
+        for name, path in (animations | frames).items():
+            jobs.append(Job(name, partial(decode_subfolders, path), convert_subfolders, ("atlas_index",)))
+        for name in animations: # the left facing bank is flipped from the converted right facing one
+            jobs.append(Job(f"{name}_left", flip_frames, needs = (name,)))
+        if audio:
+            for name, path in sounds.items():
+                jobs.append(Job(f"sound_{name}", partial(pygame.mixer.Sound, os.path.join(abs_path, *path))))
+        return jobs
 
-    def import_assets(self):
+    def import_assets(self, audio = True, progress = None):
+        assets = run_jobs(self.asset_jobs(audio), progress)
+
+        # right (1) and left (-1) facing banks, built once and shared by every entity using them
+        banks = {name: {1: assets[name], -1: assets[f"{name}_left"]} for name in ["sbasic", "wbasic", "dbasic", "samurai", "archer", "player"]}
         self.level_frames = {
-            "sbasic": import_subfolders("assets", "graphics", "enemies", "sbasic"),
-            "wbasic": import_subfolders("assets", "graphics", "enemies", "wbasic"),
-            "dbasic": import_subfolders("assets", "graphics", "enemies", "dbasic"),
-            "samurai": import_subfolders("assets", "graphics", "enemies", "bossSamurai"),
-            "archer": import_subfolders("assets", "graphics", "enemies", "bossArcher"),
-            "bg_tiles": import_subfolders("assets", "graphics", "background"),
+            "sbasic": banks["sbasic"],
+            "wbasic": banks["wbasic"],
+            "dbasic": banks["dbasic"],
+            "samurai": banks["samurai"],
+            "archer": banks["archer"],
+            "bg_tiles": assets["bg_tiles"]
         }
-        self.player_frames = import_subfolders("assets", "graphics", "player")
+        self.player_frames = banks["player"]
         self.ui_frames = {
-            "player": import_subfolders("assets", "graphics", "ui", "player"),
-            "archer": import_subfolders("assets", "graphics", "ui", "bossArcher"),
-            "samurai": import_subfolders("assets", "graphics", "ui", "bossSamurai"),
-            "menu": import_subfolders("assets", "graphics", "ui", "menu")
+            "player": assets["ui_player"],
+            "archer": assets["ui_archer"],
+            "samurai": assets["ui_samurai"],
+            "menu": assets["ui_menu"]
         }
+        self.attack_impact_frames = assets["attack_data"]
 
-        self.audio_files = {
-            'spring_bgm': pygame.mixer.Sound(os.path.join(abs_path, "assets", "audio", "bgm", "spring_bgm.mp3")),
-            'winter_bgm': pygame.mixer.Sound(os.path.join(abs_path, "assets", "audio", "bgm", "winter_bgm.mp3")),
-            'desert_bgm': pygame.mixer.Sound(os.path.join(abs_path, "assets", "audio", "bgm", "desert_bgm.mp3")),
-            'dash': pygame.mixer.Sound(os.path.join(abs_path, "assets", "audio", "effects", "dash.wav")),
-            'swing': pygame.mixer.Sound(os.path.join(abs_path, "assets", "audio", "effects", "swing.wav")),
-            'block': pygame.mixer.Sound(os.path.join(abs_path, "assets", "audio", "effects", "block.wav")),
-        }
-        self.audio_files['spring_bgm'].set_volume(0.2)
-        self.audio_files['swing'].set_volume(0.5)
+        if audio:
+            self.audio_files = {name.removeprefix("sound_"): sound for name, sound in assets.items() if name.startswith("sound_")}
+            self.audio_files['swing'].set_volume(0.5)
+
+    def draw_loading(self, done, total):
+        # shown between finished jobs while the rest decode, at most once per frame
+        now = pygame.time.get_ticks()
+        if done < total and now - self.loading_drawn < 1000 / FPS:
+            return
+        self.loading_drawn = now
 
-        with open(os.path.join(abs_path, "data", "json", "attack_data.json")) as jsonf:
-            self.attack_impact_frames = json.load(jsonf)
+        pygame.event.pump()
+        bar = pygame.FRect(0, 0, GAME_WIDTH / 2, 6)
+        bar.center = (GAME_WIDTH / 2, GAME_HEIGHT * 0.75)
+        self.display_surf.fill('black')
+        self.display_surf.blit(render_text("loading", 12, "white"), (bar.left, bar.top - 18))
+        pygame.draw.rect(self.display_surf, "white", bar, 1)
+        pygame.draw.rect(self.display_surf, "white", (bar.left, bar.top, bar.width * done / total, bar.height))
+        presenter.present(self.display_surf)
+
+    def build_level(self, name):
+        # only the map is loaded on the loader thread, surfaces and timers are made here on the main thread
+        if name in self.pending:
+            self.tmx_data[name] = self.pending.pop(name).result()
+        elif name not in self.tmx_data:
+            self.tmx_data[name] = load_map(name)
+        return Level(name, self.tmx_data[name], self.ui_frames, self.level_frames, self.audio_files, self.player_frames, self.attack_impact_frames, self.headless)
+
+    def reset_level(self, level, seed = None):
+        level.reset(self.tmx_data[level.name], self.level_frames, self.audio_files, self.player_frames, self.attack_impact_frames, seed)
+        return level
+
+    def prepare(self, name):
+        # the highlighted map loads in the background, the level is built from it here while the menu idles
+        if name not in MAPS:
+            return
+        self.last_visit[name] = pygame.time.get_ticks()
+        if name in self.stages:
+            return
+        if name in self.tmx_data or (name in self.pending and self.pending[name].done()):
+            self.stages[name] = self.build_level(name)
+        elif name not in self.pending:
+            self.pending[name] = self.loader.submit(load_map, name)
+
+    def release(self, level):
+        # the level stays built, the next attempt starts from a fresh reset
+        self.reset_level(level)
+
+    def evict(self):
+        # maps not entered or highlighted for a while are dropped with their levels and loaded again when needed
+        for name in [name for name, future in self.pending.items() if future.done()]:
+            self.tmx_data[name] = self.pending.pop(name).result()
+
+        now = pygame.time.get_ticks()
+        for name in list(self.tmx_data):
+            if self.stages.get(name) is not self.current_stage and now - self.last_visit.get(name, now) > LEVEL_EVICT_TIME:
+                if name in self.stages:
+                    scheduler.drop(self.stages.pop(name))
+                del self.tmx_data[name]
+
+    def get_stage(self, name):
+        if name not in self.stages:
+            self.stages[name] = self.build_level(name)
+        self.last_visit[name] = pygame.time.get_ticks()
+        return self.stages[name]
+
+    def save_recording(self):
+        self.recording.finish(self.current_stage)
+        self.recording.save(os.path.join(self.record_dir, f"{self.recording.stage}-{self.recording.seed}.replay"))
+        self.recording = None
 
     def set_stage(self, stage):
         if isinstance(self.current_stage, Level):
-            self.current_stage.reset(self.tmx_data[self.current_stage.name], self.level_frames, self.audio_files, self.player_frames, self.attack_impact_frames)
+            if self.recording:
+                self.save_recording()
+            self.release(self.current_stage)
 
-        self.current_stage = self.stages[stage]
+        self.current_stage = self.get_stage(stage)
+        if isinstance(self.current_stage, Level) and self.record_dir:
+            # rebuilt on entry so the recording starts from a state a replay can reproduce
+            self.reset_level(self.current_stage)
+            self.recording = Replay.record(self.current_stage)
         self.current_stage.in_transition.start()
 
-        pygame.mixer.stop()
-        if isinstance(self.current_stage, Level):
-            self.audio_files[f'{self.current_stage.name}_bgm'].play(-1)
+        voices.listener = self.current_stage.camera if isinstance(self.current_stage, Level) else None
+
+        # a level keeps the track its menu selection was already playing
+        music.play(self.current_stage.name if isinstance(self.current_stage, Level) else self.current_stage.level_selection)
 
     def check_stage(self):
         if isinstance(self.current_stage, Level):
@@ -109,29 +225,61 @@ class Game:
         if self.quit_timer.active:
             self.set_stage("main_menu")
 
+    def step(self):
+        dt = scheduler.advance(STEP)
+        controls.poll()
+        self.current_stage.update(dt)
+        self.check_stage()
+        self.return_to_menu()
+
+        if isinstance(self.current_stage, MainMenu):
+            self.prepare(self.current_stage.level_selection)
+            self.evict()
+
     def run(self):
+        accumulator = 0
+        skipped = 0
         running = True
         while running:
-            dt = self.clock.tick(FPS) / 1000
+            accumulator += self.clock.tick(RENDER_FPS) / 1000
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
+            music.update() # starts a queued track once the last one has faded out
 
-            self.quit_timer.update()
-            self.current_stage.run(dt)
-            self.check_stage()
-            self.return_to_menu()
+            # the simulation always advances in fixed steps, rendering runs at whatever rate the display allows
+            steps = 0
+            while accumulator >= STEP and steps < MAX_STEPS:
+                self.step()
+                accumulator -= STEP
+                steps += 1
+
+            behind = accumulator >= STEP
+            if behind: # drop the backlog instead of spiralling
+                accumulator %= STEP
+            if behind and skipped < MAX_FRAME_SKIP:
+                skipped += 1
+                continue
+            skipped = 0
+
+            self.current_stage.draw(accumulator / STEP)
 
             # debug(self.current_stage.status if isinstance(self.current_stage, Level) else None)
             # debug(self.quit_timer.active, y = 20)
             # debug(self.quit_timer.activated, y = 20, x = 50)
 
-            self.display.blit(pygame.transform.scale_by(self.display_surf, SCALE_FACTOR), (0, 0))
-            pygame.display.update()
+            presenter.present(self.display_surf)
 
+        if self.recording:
+            self.save_recording()
+        self.loader.shutdown(cancel_futures = True)
         pygame.quit()
         sys.exit()
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description = "Blade Hymn")
+    parser.add_argument('--record', metavar = 'DIR', help = "save a replay of every level attempt to this folder")
+    args = parser.parse_args()
+
+    game = Game(record = args.record)
     game.run()
\ No newline at end of file
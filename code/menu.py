@@ -1,27 +1,29 @@
 from constants import *
+from camera import Camera
 from sprite import Sprite, Transition
 from groups import MenuSprites, ParallaxSprites, TextSprites
 from ui import Button, SelectionIndicator, Text
 from timer import Timer
+from presenter import presenter
+from music import music
+from utility import desaturate
 
 class MainMenu:
-    def __init__(self, bg_frames, ui_frames, audio_files):
+    def __init__(self, bg_frames, ui_frames):
         self.display_surf = MASTER_DISPLAY
 
         # groups
+        self.camera = Camera(GAME_WIDTH, GAME_HEIGHT)
         self.sprites = pygame.sprite.Group()
-        self.bg_sprites = ParallaxSprites()
+        self.bg_sprites = ParallaxSprites(self.camera) # draw moves the shared camera, the text re-aims it afterwards
         self.button_sprites = pygame.sprite.Group()
         self.graphic_sprites = MenuSprites()
-        self.text_sprites = TextSprites(GAME_WIDTH, GAME_HEIGHT)
+        self.text_sprites = TextSprites(self.camera)
 
         self.timers = {
             "button_click": Timer(200, sustained=True)
         }
 
-        # sound
-        self.music = audio_files
-
         # input
         self.mouse_pos = (0, 0)
         self.mouse_states = None
@@ -38,9 +40,14 @@ class MainMenu:
 
         for name, scene in bg_frames.items():
             bg_frames[name] = [pygame.transform.scale(image, (GAME_WIDTH + 40, GAME_HEIGHT + 40)) for image in bg_frames[name]]
-        self.bg_frames = bg_frames
 
-        self.music[f'{self.level_selection}_bgm'].play(-1)
+        # each layer is washed out once for itself and once for every layer drawn above it
+        self.bg_frames = {
+            name: [desaturate(image, times = len(scene) - index) for index, image in enumerate(scene)]
+            for name, scene in bg_frames.items()
+        }
+        self.bg_selection = None
+
         self.setup(ui_frames["menu"])
 
     def setup(self, ui_frames):
@@ -70,8 +77,7 @@ class MainMenu:
                     self.out_transition.start()
                 else:
                     if self.level_selection != button.tag and button.tag != 'quit':
-                        pygame.mixer.stop()
-                        self.music[f'{button.tag}_bgm'].play(-1)
+                        music.play(button.tag)
 
                     self.level_selection = button.tag
                     self.selection_pos = button.rect.center
@@ -82,22 +88,21 @@ class MainMenu:
             sys.exit()
 
     def input(self):
-        self.mouse_pos = [axis / SCALE_FACTOR for axis in pygame.mouse.get_pos()]
+        self.mouse_pos = presenter.to_game(pygame.mouse.get_pos())
         self.mouse_states = pygame.mouse.get_pressed()
         self.key_states = pygame.key.get_pressed()
 
     def update_bg(self):
-        self.bg_sprites.empty()
+        if self.bg_selection == self.level_selection:
+            return
+        self.bg_selection = self.level_selection
+
+        for sprite in self.bg_sprites:
+            sprite.kill()
         for frame in range(len(self.bg_frames[self.level_selection])):
             Sprite((0, 0), self.bg_frames[self.level_selection][frame], (self.sprites, self.bg_sprites), frame)
 
-    def update_timers(self):
-        for timer in self.timers.values():
-            timer.update()
-
-    def run(self, dt):
-        self.update_timers()
-
+    def update(self, dt):
         self.input()
         self.sprites.update(dt,
             selection_pos = self.selection_pos,
@@ -108,10 +113,16 @@ class MainMenu:
         self.check_states()
         self.update_bg()
 
+    def draw(self, alpha = 1):
         self.bg_sprites.draw(self.display_surf, self.mouse_pos)
         self.graphic_sprites.draw(self.display_surf)
         self.button_sprites.draw(self.display_surf)
-        self.text_sprites.draw(self.display_surf, (0, GAME_HEIGHT))
+        self.camera.update((0, GAME_HEIGHT))
+        self.text_sprites.draw(self.display_surf)
 
         self.in_transition.draw(self.display_surf)
         self.out_transition.draw(self.display_surf)
+
+    def run(self, dt):
+        self.update(dt)
+        self.draw()
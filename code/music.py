@@ -0,0 +1,48 @@
+from constants import *
+
+class Music:
+    # one streamed track at a time, a new one is queued until the current one has faded out
+    def __init__(self):
+        self.current = None
+        self.queued = None
+        self.fading = False
+
+    def play(self, track, fade = MUSIC_FADE):
+        if track not in MUSIC: # stages without a track of their own play in silence
+            self.stop(fade)
+            return
+        if track == self.queued or (track == self.current and not self.fading):
+            return
+
+        self.queued = track
+        if pygame.mixer.music.get_busy():
+            if not self.fading:
+                pygame.mixer.music.fadeout(fade)
+                self.fading = True
+        else:
+            self.start(fade)
+
+    def stop(self, fade = MUSIC_FADE):
+        self.queued = None
+        if fade:
+            pygame.mixer.music.fadeout(fade)
+            self.fading = True
+        else:
+            pygame.mixer.music.stop()
+            self.current = None
+
+    def start(self, fade = MUSIC_FADE):
+        path, volume = MUSIC[self.queued]
+        pygame.mixer.music.load(path)
+        pygame.mixer.music.set_volume(volume)
+        pygame.mixer.music.play(-1, fade_ms = fade)
+        self.current, self.queued, self.fading = self.queued, None, False
+
+    def update(self):
+        if self.fading and not pygame.mixer.music.get_busy():
+            self.fading = False
+            self.current = None
+            if self.queued:
+                self.start()
+
+music = Music()
@@ -1,15 +1,18 @@
 from constants import *
 from settings import *
 
-from timer import Timer
-from sprite import Hitbox
+from timer import Timer, scheduler
+from controls import controls
+from voices import voices
+from utility import silhouette
 
 class Player(pygame.sprite.Sprite):
     def __init__(self, pos, groups, collision_sprites, damage_sprites, frames, sounds, attack_data, level_dim):
         super().__init__(groups)
 
         # animation
-        self.frames, self.frame_index = frames, 0
+        self.animations, self.frame_index = frames, 0
+        self.frames = self.animations[1]
         self.state, self.direction = 'idle', 1
         self.image = self.frames[self.state][self.frame_index]
         self.z = Z_VALUES['player']
@@ -18,6 +21,7 @@ class Player(pygame.sprite.Sprite):
         self.rect = self.image.get_frect(topleft=pos)
         self.hitbox_rect = self.rect.inflate(-72, -32)
         self.prev_rect = self.hitbox_rect.copy()
+        self.prev_pos = None # drawn position at the start of the last step
 
         self.camera_rect = self.hitbox_rect.copy()
 
@@ -82,7 +86,7 @@ class Player(pygame.sprite.Sprite):
         }
 
     def input(self, dt):
-        keys = pygame.key.get_pressed()
+        keys = controls.keys
         movement_vect = vector(0, 0)
 
         if not self.control_lock:
@@ -116,7 +120,7 @@ class Player(pygame.sprite.Sprite):
     # input related actions
     def dash(self, speed):
         if self.dash_count > 0 and not self.timers["dash_cooldown"].active:
-            self.dash_sound.play()
+            voices.play(self.dash_sound, self.hitbox_rect.center, VOICE_PRIORITY['player'])
             speed = self.dash_distance * self.direction
 
             self.dash_count -= 1
@@ -205,16 +209,15 @@ class Player(pygame.sprite.Sprite):
 
     def check_collisions(self):
         ground_rect = pygame.FRect(self.hitbox_rect.bottomleft, (self.hitbox_rect.width, 2))
-        collide_rects = [sprite.rect for sprite in self.collision_sprites]
-        damage_rects = [sprite for sprite in self.damage_sprites if sprite.tag == 'enemy']
+        damage_rects = self.damage_sprites.nearby('enemy', self.hitbox_rect)
 
-        self.colliding["ground"] = True if ground_rect.collidelist(collide_rects) >= 0 else False
+        self.colliding["ground"] = self.collision_sprites.collide(ground_rect)
 
         self.damaging_hitbox = self.hitbox_rect.collideobjects(damage_rects, key=lambda x: x.rect)
         self.colliding["hitbox"] = True if self.damaging_hitbox else False
 
     def surface_collisions(self, axis):
-        for sprite in self.collision_sprites:
+        for sprite in self.collision_sprites.nearby(self.hitbox_rect.union(self.prev_rect)):
             if sprite.rect.colliderect(self.hitbox_rect):
                 if axis == 'x': # horizontal
                     if self.hitbox_rect.left <= sprite.rect.right:
@@ -294,8 +297,8 @@ class Player(pygame.sprite.Sprite):
 
     # animations
     def animate(self, dt):
-        self.image = self.frames[self.state][int(self.frame_index % len(self.frames[self.state]))]
-        self.image = self.image if self.direction > 0 else pygame.transform.flip(self.image, True, False)
+        facing = 1 if self.direction > 0 else -1
+        self.image = self.animations[facing][self.state][int(self.frame_index % len(self.frames[self.state]))]
         self.frame_index += ANIMATION_SPEED * dt
 
     def get_state(self):
@@ -318,37 +321,29 @@ class Player(pygame.sprite.Sprite):
             self.state = 'dash'
 
     def hit_flicker(self):
-        if self.timers["hit_cooldown"].active and math.sin(pygame.time.get_ticks() / 16) >= 0:
-            white_mask = pygame.mask.from_surface(self.image)
-            white_surf = white_mask.to_surface()
-            white_surf.set_colorkey('black')
-            self.image = white_surf
+        if self.timers["hit_cooldown"].active and math.sin(scheduler.time / 16) >= 0:
+            self.image = silhouette(self.image)
 
     # updates
-    def update_timers(self):
-        for timer in self.timers.values():
-            timer.update()
-
     def update_hitboxes(self):
         if 'melee' in self.state or 'air' in self.state:
             if int(self.frame_index) + 1 in self.attack_data[self.state]["impact"]:
                 self.timers["attack"].activate()
                 if not self.timers["sound"].active:
-                    self.swing_sound.play()
+                    voices.play(self.swing_sound, self.hitbox_rect.center, VOICE_PRIORITY['player'])
                     self.timers["sound"].activate()
         else:
             self.timers["attack"].deactivate()
 
         if self.timers["attack"].active:
-            Hitbox('player',
-                   self.hitbox_rect.center,
-                   self.direction,
-                   self.attack_data[self.state],
-                   self.damage_sprites)
+            self.damage_sprites.spawn('player',
+                                      self.hitbox_rect.center,
+                                      self.direction,
+                                      self.attack_data[self.state])
 
     def update(self, dt):
         self.prev_rect = self.hitbox_rect.copy()
-        self.update_timers()
+        self.prev_pos = self.rect.topleft
 
         self.check_collisions()
         self.check_damage()
@@ -0,0 +1,53 @@
+from constants import *
+from time import perf_counter
+
+class Presenter:
+    def __init__(self):
+        self.mode = None
+        self.display = None
+        self.target = None # view of the display the game is scaled into
+        self.scale = vector(1, 1)
+        self.origin = vector(0, 0)
+
+        self.present_time = 0 # milliseconds spent presenting the last frame
+
+    def setup(self, mode = PRESENT_MODE):
+        self.mode = mode
+        if mode == 'scaled': # SDL scales the logical game resolution on the gpu
+            self.display = pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT), pygame.FULLSCREEN | pygame.SCALED, vsync=1)
+            self.target = self.display
+            return self.display
+
+        # opened at the desktop's real resolution so SDL never rescales the frame again, vsync needs SCALED
+        self.display = pygame.display.set_mode(pygame.display.get_desktop_sizes()[0], pygame.FULLSCREEN)
+        display_width, display_height = self.display.get_size()
+        if mode == 'integer': # largest whole scale that fits, letterboxed
+            factor = max(min(display_width // GAME_WIDTH, display_height // GAME_HEIGHT), 1)
+            size = (GAME_WIDTH * factor, GAME_HEIGHT * factor)
+        else: # nearest neighbour to the largest fractional scale that fits
+            factor = min(display_width / GAME_WIDTH, display_height / GAME_HEIGHT)
+            size = (int(GAME_WIDTH * factor), int(GAME_HEIGHT * factor))
+
+        rect = pygame.Rect((0, 0), size)
+        rect.center = (display_width // 2, display_height // 2)
+        rect = rect.clip(self.display.get_rect())
+
+        self.display.fill('black')
+        self.target = self.display.subsurface(rect)
+        self.scale = vector(rect.width / GAME_WIDTH, rect.height / GAME_HEIGHT)
+        self.origin = vector(rect.topleft)
+        return self.display
+
+    def to_game(self, pos):
+        return [(pos[0] - self.origin.x) / self.scale.x, (pos[1] - self.origin.y) / self.scale.y]
+
+    def present(self, surface):
+        start = perf_counter()
+        if self.target is self.display:
+            self.display.blit(surface, (0, 0))
+        else:
+            pygame.transform.scale(surface, self.target.get_size(), self.target)
+        pygame.display.update()
+        self.present_time = (perf_counter() - start) * 1000
+
+presenter = Presenter()
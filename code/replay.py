@@ -0,0 +1,108 @@
+import argparse, struct, zlib
+
+from constants import *
+from timer import scheduler
+from presenter import presenter
+from music import music
+from voices import voices
+from controls import controls, keys_from_mask
+
+# magic, version, level seed, simulation time at the start, tick count, final state digest, stage name length
+HEADER = struct.Struct('<4sBIdIIB')
+MAGIC = b'BHRP'
+VERSION = 1
+
+def digest(level):
+    # checksum of the simulated state, a run that diverges from its recording ends on a different value
+    state = zlib.crc32(level.status.encode())
+    for sprite in level.attacking_sprites:
+        state = zlib.crc32(struct.pack('<5d', *sprite.hitbox_rect, sprite.hp), state)
+    return state
+
+class Replay:
+    def __init__(self, stage, seed, start_time, masks = None, final = 0):
+        self.stage = stage
+        self.seed = seed
+        self.start_time = start_time
+        self.masks = bytearray() if masks is None else masks # one input bitmask per simulation tick
+        self.final = final
+
+    @classmethod
+    def record(cls, level):
+        replay = cls(level.name, level.seed, scheduler.time)
+        controls.record = replay.masks
+        return replay
+
+    def finish(self, level):
+        controls.record = None
+        self.final = digest(level)
+
+    def save(self, path):
+        name = self.stage.encode()
+        with open(path, 'wb') as replayf:
+            replayf.write(HEADER.pack(MAGIC, VERSION, self.seed, self.start_time, len(self.masks), self.final, len(name)))
+            replayf.write(name)
+            replayf.write(zlib.compress(self.masks, 9))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as replayf:
+            data = replayf.read()
+
+        magic, version, seed, start_time, ticks, final, length = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay")
+        name = data[HEADER.size:HEADER.size + length].decode()
+        masks = bytearray(zlib.decompress(data[HEADER.size + length:]))
+        if len(masks) != ticks:
+            raise ValueError(f"{path} is truncated, {len(masks)} of {ticks} ticks")
+        return cls(name, seed, start_time, masks, final)
+
+    def source(self):
+        masks = iter(self.masks)
+        return lambda: keys_from_mask(next(masks))
+
+    def start(self, game):
+        # rebuilds the level exactly as it was when the recording started
+        level = game.get_stage(self.stage)
+        scheduler.time = self.start_time
+        game.reset_level(level, self.seed)
+        level.in_transition.start()
+        game.current_stage = level
+        voices.listener = level.camera
+        controls.source = self.source()
+        return level
+
+def play(game, replay, render = True):
+    level = replay.start(game)
+    for _ in replay.masks:
+        dt = scheduler.advance(STEP)
+        controls.poll()
+        level.update(dt)
+
+        if render:
+            pygame.event.pump()
+            level.draw()
+            presenter.present(game.display_surf)
+            game.clock.tick(FPS)
+
+    controls.source = None
+    return digest(level) == replay.final
+
+def main():
+    from main import Game
+
+    parser = argparse.ArgumentParser(description = "Re-run recorded level sessions and check they end in the recorded state.")
+    parser.add_argument('replays', nargs = '+', help = "replay files written by main.py --record")
+    parser.add_argument('--no-render', action = 'store_true', help = "simulate without drawing, as fast as possible")
+    args = parser.parse_args()
+
+    game = Game()
+    music.stop(0)
+    for path in args.replays:
+        replay = Replay.load(path)
+        match = play(game, replay, not args.no_render)
+        print(f"{path}: {replay.stage} seed {replay.seed} {len(replay.masks)} ticks {'match' if match else 'DIVERGED'}")
+
+if __name__ == "__main__":
+    main()
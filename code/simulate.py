@@ -0,0 +1,115 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse, json
+from collections import defaultdict
+from time import perf_counter
+
+from constants import *
+from timer import scheduler
+from controls import controls, keys_from_mask
+from voices import voices
+
+from main import Game
+from replay import Replay, digest
+from benchmark import SCENARIOS
+
+class Silence:
+    # stands in for every sound, nothing is decoded or mixed
+    def play(self, *args, **kwargs):
+        return None
+
+class Simulation(Game):
+    # steps headless levels as fast as the cpu allows, no window, audio, menu or frame cap
+    def __init__(self, headless = True):
+        pygame.init()
+        pygame.display.set_mode((1, 1)) # converting the frames still needs a display mode
+
+        # levels are built on first use and kept for every later run, they can still be drawn off screen when not headless
+        self.setup(headless = headless, audio = False)
+        self.audio_files = defaultdict(Silence)
+        voices.enabled = False # the pool may already be set up by a game earlier in the process
+
+    def start(self, name, seed = 0):
+        if name not in MAPS:
+            raise ValueError(f"simulations only run levels, {name} is not one of {', '.join(MAPS)}")
+        level = self.get_stage(name)
+        self.reset_level(level, seed)
+        level.in_transition.start()
+        self.current_stage = level
+        return level
+
+    def simulate(self, level, ticks, timeline, done = None):
+        # runs until the level is won or lost or done returns true, timeline returns the keys held on each tick
+        tick = 0
+        controls.source = lambda: timeline(tick, level)
+        start = perf_counter()
+        while tick < ticks:
+            dt = scheduler.advance(STEP)
+            controls.poll()
+            level.update(dt)
+            tick += 1
+            if level.status != 'normal' or (done and done(level)):
+                break
+        elapsed = perf_counter() - start
+        controls.source = None
+        return tick, elapsed
+
+    def run_scenario(self, name, seed = 0):
+        stage_name, ticks, timeline, setup = SCENARIOS[name]
+        level = self.start(stage_name, seed)
+        if setup:
+            setup(level)
+        return self.report(level, *self.simulate(level, ticks, timeline))
+
+    def run_replay(self, replay):
+        level = replay.start(self)
+        masks = replay.masks
+        result = self.report(level, *self.simulate(level, len(masks), lambda tick, level: keys_from_mask(masks[tick])))
+        result['match'] = digest(level) == replay.final
+        return result
+
+    def report(self, level, ticks, elapsed):
+        return {
+            'stage': level.name,
+            'seed': level.seed,
+            'ticks': ticks,
+            'seconds': elapsed,
+            'ticks_per_second': ticks / elapsed if elapsed else None,
+            'status': level.status
+        }
+
+def main():
+    level_scenarios = [name for name, scenario in SCENARIOS.items() if scenario[0] != 'main_menu']
+    parser = argparse.ArgumentParser(description = "Faster than realtime headless level simulation.")
+    parser.add_argument('scenarios', nargs = '*', default = level_scenarios, help = "scripted scenarios to run, all level scenarios by default")
+    parser.add_argument('--replay', nargs = '+', default = [], help = "replay files to run instead of or besides the scenarios")
+    parser.add_argument('--repeat', type = int, default = 1, help = "runs of each scenario, seeded 0 to repeat - 1")
+    parser.add_argument('--output', help = "write the results as json to this file")
+    args = parser.parse_args()
+    if args.replay and args.scenarios == level_scenarios:
+        args.scenarios = []
+    for name in args.scenarios:
+        if name not in level_scenarios:
+            parser.error(f"{name} is not a level scenario, choose from {', '.join(level_scenarios)}")
+
+    simulation = Simulation()
+    results = {}
+    for name in args.scenarios:
+        results[name] = [simulation.run_scenario(name, seed) for seed in range(args.repeat)]
+    for path in args.replay:
+        replay = Replay.load(path)
+        results[os.path.basename(path)] = [simulation.run_replay(replay) for _ in range(args.repeat)]
+
+    ticks = sum(run['ticks'] for runs in results.values() for run in runs)
+    seconds = sum(run['seconds'] for runs in results.values() for run in runs)
+    report = {'results': results, 'ticks': ticks, 'seconds': seconds, 'ticks_per_second': ticks / seconds if seconds else None}
+
+    if args.output:
+        with open(args.output, 'w') as jsonf:
+            json.dump(report, jsonf, indent = 2)
+    print(json.dumps(report, indent = 2))
+
+if __name__ == "__main__":
+    main()
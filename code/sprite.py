@@ -9,6 +9,7 @@ class Sprite(pygame.sprite.Sprite):
 
         self.rect = self.image.get_frect(topleft=pos)
         self.prev_rect = self.rect.copy()
+        self.prev_pos = None # drawn position at the start of the last step, only kept by sprites that move
 
 class AnimatedSprite(Sprite):
     def __init__(self, pos, frames, groups = None, z = 1):
@@ -24,16 +25,24 @@ class AnimatedSprite(Sprite):
         self.image = self.frames[int(self.frame_index) % len(self.frames)]
 
 # enemy interaction + combat
-class Hitbox(Sprite):
+class Hitbox(pygame.sprite.Sprite):
     def __init__(self, tag, pos, direction, data, groups = None, colour = 'red', z = 10):
-        surf = pygame.Surface(data['size'])
-        surf.fill(colour)
-
-        pos = (pos[0] + data['rel_pos'][0] * direction, pos[1] + data['rel_pos'][1])
-        super().__init__(pos, surf, groups, z)
+        super().__init__(groups)
+        self.z = z
+        self.colour = colour
 
-        self.rect = self.image.get_frect(center=pos)
+        self.image = None # only drawn when hitboxes are shown for debugging
+        self.rect = pygame.FRect()
+        self.reset(tag, pos, direction, data)
         self.prev_rect = self.rect.copy()
+        self.prev_pos = None
+
+        self.visible = SHOW_HITBOXES
+        self.sustained = False
+
+    def reset(self, tag, pos, direction, data):
+        self.rect.size = data['size']
+        self.rect.center = (pos[0] + data['rel_pos'][0] * direction, pos[1] + data['rel_pos'][1])
 
         self.tag = tag
         self.direction = direction
@@ -41,13 +50,14 @@ class Hitbox(Sprite):
         self.knockback = data['knockback']
         self.stun = data['stun']
 
-        self.visible = False
-        self.sustained = False
+        if SHOW_HITBOXES:
+            self.image = pygame.Surface(self.rect.size)
+            self.image.fill(self.colour)
 
 class Projectile(Hitbox):
-    def __init__(self, tag, pos, direction, data, image, collision_rects, groups = None, z = 10):
+    def __init__(self, tag, pos, direction, data, image, collision_sprites, groups = None, z = 10):
         super().__init__(tag, pos, direction, data, groups, z = z)
-        self.image = image if self.direction > 0 else pygame.transform.flip(image, True, False)
+        self.image = image
         self.rect = self.image.get_frect(center = pos)
         self.prev_rect = self.rect.copy()
 
@@ -57,24 +67,24 @@ class Projectile(Hitbox):
         self.data = data
         self.velocity = vector(data['velocity'][0] * direction, data['velocity'][1])
 
-        self.collision_rects = collision_rects
+        self.collision_sprites = collision_sprites
+        self.damage_sprites = groups
         self.timer = Timer(1000, sustained = True)
         self.timer.activate()
 
         self.hitbox = None
 
     def update(self, dt):
-        self.hitbox = Hitbox(
+        self.prev_pos = self.rect.topleft
+        self.hitbox = self.damage_sprites.spawn(
             tag = 'enemy',
             pos = self.rect.center,
             direction = self.direction,
             data = self.data,
-            groups = self.groups(),
             colour = 'blue'
         )
 
-        self.timer.update()
-        if self.hitbox.rect.collidelist(self.collision_rects) >= 0:
+        if self.collision_sprites.collide(self.hitbox.rect):
             self.timer.deactivate()
 
         if self.timer.active:
@@ -86,8 +96,10 @@ class Projectile(Hitbox):
 
 # effects
 class Transition(Sprite):
-    def __init__(self, duration, target, colour = 'black', groups = None):
-        super().__init__((0, 0), pygame.Surface((GAME_WIDTH * 5, GAME_HEIGHT * 5), pygame.SRCALPHA), groups, 99)
+    def __init__(self, duration, target, colour = 'black', groups = None, headless = False):
+        # a headless fade is never drawn, only its alpha and timer are kept
+        size = (1, 1) if headless else (GAME_WIDTH * 5, GAME_HEIGHT * 5)
+        super().__init__((0, 0), pygame.Surface(size, pygame.SRCALPHA), groups, 99)
 
         self.image.fill(colour)
         self.target_alpha = target
@@ -109,7 +121,6 @@ class Transition(Sprite):
     def update(self, dt, **kwargs):
         if self.active:
             change = (self.target_alpha - self.image.get_alpha()) / self.timer.duration * 5000
-            self.timer.update()
             self.image.set_alpha(self.image.get_alpha() + (change * dt))
 
             if not self.timer.active:
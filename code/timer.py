@@ -1,42 +1,93 @@
 from constants import *
+from heapq import heappush, heappop, heapify
+from itertools import count
+from contextlib import contextmanager
+
+class Scheduler:
+    def __init__(self):
+        self.time = 0 # simulation time in milliseconds
+        self.scale = 1
+        self.paused = False
+
+        self.deadlines = [] # heap of (deadline, order, timer, generation)
+        self.order = count()
+        self.pulsed = [] # non sustained timers that fired on the last advance
+        self.owner = None # timers created now belong to this, usually a level
+
+    @contextmanager
+    def owning(self, owner):
+        previous, self.owner = self.owner, owner
+        try:
+            yield
+        finally:
+            self.owner = previous
+
+    def drop(self, owner):
+        # a reset or evicted level takes its timers with it, repeating ones would otherwise reschedule forever
+        self.deadlines = [entry for entry in self.deadlines if entry[2].owner is not owner]
+        heapify(self.deadlines)
+
+    def schedule(self, timer):
+        heappush(self.deadlines, (timer.start_time + timer.duration, next(self.order), timer, timer.generation))
+
+    def advance(self, dt):
+        # returns the step the simulation should take, so pausing and scaling apply to movement as well as timers
+        for timer in self.pulsed:
+            timer.active = False
+        self.pulsed.clear()
+
+        if self.paused:
+            return 0
+
+        dt *= self.scale
+        self.time += dt * 1000
+        while self.deadlines and self.deadlines[0][0] <= self.time:
+            _, _, timer, generation = heappop(self.deadlines)
+            if timer.activated and timer.generation == generation: # skip deadlines of restarted or stopped timers
+                timer.expire()
+        return dt
+
+scheduler = Scheduler()
 
 class Timer:
     def __init__(self, duration, auto_start = False, repeat = False, sustained = False):
         self.duration = duration
         self.repeat = repeat
         self.sustained = sustained
+        self.owner = scheduler.owner
 
         self.activated = False
+        self.generation = 0
 
         self.active = False
         self.start_time = 0
         if auto_start:
             self.activate()
 
-        self.time = 0
+    @property
+    def time(self):
+        return scheduler.time - self.start_time
 
     def activate(self):
         self.activated = True
-        self.start_time = pygame.time.get_ticks()
+        self.start_time = scheduler.time
+        self.generation += 1
+        scheduler.schedule(self)
         if self.sustained:
             self.active = True
 
     def deactivate(self):
         self.activated = False
+        self.generation += 1
         if self.sustained:
             self.active = False
 
-    def update(self):
+    def expire(self):
+        self.active = True
         if not self.sustained:
-            self.active = False
-
-        current_time = pygame.time.get_ticks()
-        self.time = current_time - self.start_time
-        if self.activated:
-            if self.time >= self.duration:
-                self.active = True
+            scheduler.pulsed.append(self)
 
-                if self.repeat:
-                    self.activate()
-                else:
-                    self.deactivate()
\ No newline at end of file
+        if self.repeat:
+            self.activate()
+        else:
+            self.deactivate()
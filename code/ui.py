@@ -1,5 +1,6 @@
 from constants import *
 from sprite import Sprite, AnimatedSprite
+from utility import load_font, render_text
 
 # in game
 class HealthBar(Sprite):
@@ -9,23 +10,26 @@ class HealthBar(Sprite):
         self.max_hp = max_hp
         self.frames = frames["health"]
 
-        self.sustained = True
+        self.image = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        self.hp = None # hp the bar was last rendered with
+
         self.visible = True
 
     def update(self, **kwargs):
         hp = kwargs.get('hp', 0)
-        scale = (hp if hp > 0 else 0) / self.max_hp
-        scaled_width = self.rect.width * scale
+        hp = hp if hp > 0 else 0
+        if hp == self.hp:
+            return
+        self.hp = hp
+
+        scaled_width = self.rect.width * hp / self.max_hp
         scaled_bar = pygame.transform.scale(self.frames[1], (scaled_width, self.rect.height))
 
-        self.image = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
+        self.image.fill((0, 0, 0, 0))
         self.image.blit(self.frames[2], (0, 0))
         self.image.blit(scaled_bar, (0, 0))
         self.image.blit(self.frames[0], (0, 0))
 
-        self.rect = self.image.get_frect(midleft=self.rect.midleft)
-        self.prev_rect = self.rect.copy()
-
 class CounterToken(Sprite):
     def __init__(self, pos, index, surf, max_count, groups, z = Z_VALUES["ui"]):
         super().__init__(pos, surf[0], groups, z)
@@ -35,11 +39,14 @@ class CounterToken(Sprite):
             pos[1]
         ))
 
+        self.index = index
         self.max_count = max_count
-        self.sustained = False
 
         self.visible = True
 
+    def update(self, **kwargs):
+        self.visible = self.index < kwargs.get('count', 0)
+
 class Counter(AnimatedSprite):
     def __init__(self, pos, animation, frame, max_count, groups, z = Z_VALUES["ui"]):
         super().__init__(pos, frame, groups, z)
@@ -48,39 +55,47 @@ class Counter(AnimatedSprite):
         self.cover = frame[0]
         self.frames = animation
 
-        self.sustained = True
+        self.image = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        self.image.set_colorkey('black')
+        self.rendered = None # (count, frame) the counter was last rendered with
+
         self.visible = True
 
     def update(self, **kwargs):
         count = kwargs.get('count', 0)
         dt = kwargs.get('dt', 0)
 
+        self.frame_index += ANIMATION_SPEED * dt
+        frame = int(self.frame_index) % len(self.frames)
+        if (count, frame) == self.rendered:
+            return
+        self.rendered = (count, frame)
+
         multiplier = (count if count > 0 else 0) / self.max_count
         y_offset = (self.rect.height - 48) * (1 - multiplier)
 
-        self.frame_index += ANIMATION_SPEED * dt
-
-        self.image = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
-        self.image.blit(self.frames[int(self.frame_index) % len(self.frames)], (0, y_offset))
+        self.image.fill((0, 0, 0, 0))
+        self.image.blit(self.frames[frame], (0, y_offset))
         self.image.blit(self.cover, (0, 0))
-        self.image.set_colorkey('black')
-
-        self.rect = self.image.get_frect(midleft=self.rect.midleft)
-        self.prev_rect = self.rect.copy()
 
 # menu
 class Text(pygame.sprite.Sprite):
     def __init__(self, pos, text, size, groups = None):
         super().__init__(groups)
-        self.font = pygame.font.Font(os.path.join(abs_path, 'data', 'ttf', 'PixelifySans.ttf'), size)
+        self.font = load_font(FONT_PATH, size)
 
         self.text = text.split('\n')
         self.size = size
         self.pos = pos
 
+        # lines are spaced by the font size but each one renders at the full font height
+        width = max(self.font.size(line)[0] for line in self.text)
+        height = (len(self.text) - 1) * self.size + 1 + self.font.get_height()
+        self.rect = pygame.FRect(pos, (width, height))
+
     def draw(self, display_surf, offset):
         for i, line in enumerate(self.text):
-            display_surf.blit(self.font.render(line, False, "black"), (self.pos[0], self.pos[1] + i * self.size + 1) + offset)
+            display_surf.blit(render_text(line, self.size, "black"), (self.pos[0], self.pos[1] + i * self.size + 1) + offset)
 
 class SelectionIndicator(Sprite):
     def __init__(self, pos, size, padding, groups = None, z = Z_VALUES["ui"]):
@@ -1,21 +1,103 @@
 from constants import *
+import hashlib, json, zlib
+from functools import lru_cache
+from weakref import WeakKeyDictionary
+
+# white hit flash versions of frames, built on first use
+silhouettes = WeakKeyDictionary()
+
+ATLAS_DIR = os.path.join(abs_path, "assets", "atlas")
+atlas_index = None # frame rects of every packed set, read on first use
 
 def import_image(*path, alpha = True):
     full_path = os.path.join(abs_path, *path)
     return pygame.image.load(full_path).convert_alpha() if alpha else pygame.image.load(full_path).convert()
 
-def import_folder(*path):
+def import_json(*path):
+    with open(os.path.join(abs_path, *path)) as jsonf:
+        return json.load(jsonf)
+
+def decode_folder(*path):
+    # decoding needs no display, so it can run off the main thread
     frames = []
     for folder_path, _, image_names in os.walk(os.path.join(abs_path, *path)):
         image_names = [name for name in image_names if name.endswith( ".png")]
         for image_name in sorted(image_names, key = lambda x: int(x.split('.')[0])):
             path = os.path.join(folder_path, image_name)
-            frames.append(pygame.image.load(path).convert_alpha())
+            frames.append(pygame.image.load(path))
     return frames
 
-def import_subfolders(*path):
+def import_folder(*path):
+    return [frame.convert_alpha() for frame in decode_folder(*path)]
+
+def source_signature(*path):
+    # names, sizes and modification times of a set's frames, an atlas is stale once they change
+    signature = hashlib.sha1()
+    for folder_path, _, image_names in sorted(os.walk(os.path.join(abs_path, *path))):
+        for image_name in sorted(name for name in image_names if name.endswith(".png")):
+            stat = os.stat(os.path.join(folder_path, image_name))
+            signature.update(f"{os.path.relpath(folder_path, abs_path)}/{image_name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return signature.hexdigest()
+
+def load_atlas_index():
+    index_path = os.path.join(ATLAS_DIR, "index.json")
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path) as jsonf:
+        return json.load(jsonf)
+
+def decode_subfolders(path, index = None):
+    # the atlas and its frame rects when the index has a current one, loose frames otherwise
+    # loose frames that are missing, as in a packaged build, leave nothing to compare the atlas against
+    entry = index.get('/'.join(path)) if index else None
+    if entry and (not os.path.isdir(os.path.join(abs_path, *path)) or entry['signature'] == source_signature(*path)):
+        with open(os.path.join(ATLAS_DIR, entry['image']), 'rb') as atlasf:
+            return pygame.image.frombuffer(zlib.decompress(atlasf.read()), entry['size'], 'BGRA'), entry['frames']
+
     frame_dict = {}
     for _, subfolders, _ in os.walk(os.path.join(abs_path, *path)):
         for subfolder in subfolders:
-            frame_dict[subfolder] = import_folder(*path, subfolder)
-    return frame_dict
\ No newline at end of file
+            frame_dict[subfolder] = decode_folder(*path, subfolder)
+    return None, frame_dict
+
+def convert_subfolders(decoded):
+    # main thread only, conversion needs the display
+    atlas, frame_dict = decoded
+    if atlas is None:
+        return {name: [frame.convert_alpha() for frame in frames] for name, frames in frame_dict.items()}
+    atlas = atlas.convert_alpha()
+    return {name: [atlas.subsurface(rect) for rect in rects] for name, rects in frame_dict.items()}
+
+def import_subfolders(*path, atlas = True):
+    # frames are views into a packed atlas when one is current, loose images otherwise
+    global atlas_index
+    if atlas and atlas_index is None:
+        atlas_index = load_atlas_index()
+    return convert_subfolders(decode_subfolders(path, atlas_index if atlas else None))
+
+def flip_frames(frame_dict):
+    return {name: [pygame.transform.flip(frame, True, False) for frame in frames] for name, frames in frame_dict.items()}
+
+def silhouette(surf):
+    if surf not in silhouettes:
+        white_surf = pygame.mask.from_surface(surf).to_surface()
+        white_surf.set_colorkey('black')
+        silhouettes[surf] = white_surf
+    return silhouettes[surf]
+
+@lru_cache(maxsize = None)
+def load_font(path, size):
+    return pygame.font.Font(path, size)
+
+@lru_cache(maxsize = 256)
+def render_text(text, size, colour, path = FONT_PATH, antialias = False):
+    # rendered lines are shared between callers, blit them but never draw onto them
+    return load_font(path, size).render(text, antialias, colour)
+
+def desaturate(surf, strength = 50, times = 1):
+    # bakes the white overlay used to wash out backgrounds, applied the given number of times
+    keep = (1 - strength / 255) ** times
+    baked = surf.copy()
+    baked.fill([round(255 * keep)] * 3, special_flags = pygame.BLEND_RGB_MULT)
+    baked.fill([round(255 * (1 - keep))] * 3, special_flags = pygame.BLEND_RGB_ADD)
+    return baked
\ No newline at end of file
@@ -0,0 +1,87 @@
+from constants import *
+from itertools import count
+
+class Voice:
+    def __init__(self, channel, sound, priority, order):
+        self.channel = channel
+        self.sound = sound
+        self.priority = priority
+        self.order = order # lower started earlier
+
+    @property
+    def playing(self):
+        return self.channel.get_busy() and self.channel.get_sound() is self.sound
+
+class Voices:
+    # every sound effect plays through here, capped per sound, prioritised and faded with distance from the camera
+    def __init__(self):
+        self.channels = [] # stays empty without a mixer, every play is then ignored
+        self.enabled = True # off for simulations, whose sounds are stand-ins
+        self.voices = []
+        self.caps = {} # sound -> instances allowed at once
+        self.listener = None # camera the distance is measured from, full volume everywhere without one
+        self.order = count()
+
+        # counters
+        self.dropped = 0
+        self.stolen = 0
+
+    def setup(self, sounds, size = VOICE_COUNT):
+        # the pool is reserved so nothing outside it can take its channels
+        pygame.mixer.set_num_channels(size)
+        pygame.mixer.set_reserved(size)
+        self.channels = [pygame.mixer.Channel(index) for index in range(size)]
+        self.caps = {sounds[name]: cap for name, cap in SOUND_CAPS.items() if name in sounds}
+
+    def prune(self):
+        self.voices = [voice for voice in self.voices if voice.playing]
+
+    @property
+    def active(self):
+        self.prune()
+        return len(self.voices)
+
+    def volume(self, pos):
+        if pos is None or self.listener is None:
+            return 1
+        near, far = HEARING_RANGE
+        distance = math.dist(pos, self.listener.view_rect.center)
+        return min(max((far - distance) / (far - near), 0), 1)
+
+    def steal(self, candidates, priority):
+        # the lowest priority voice, the oldest among equals, unless all of them outrank the new one
+        candidates = [voice for voice in candidates if voice.priority <= priority]
+        if not candidates:
+            return None
+        voice = min(candidates, key = lambda voice: (voice.priority, voice.order))
+        voice.channel.stop()
+        self.voices.remove(voice)
+        self.stolen += 1
+        return voice.channel
+
+    def play(self, sound, pos = None, priority = 0):
+        if not self.enabled or not self.channels or not isinstance(sound, pygame.mixer.Sound):
+            return None
+
+        volume = self.volume(pos)
+        if volume <= 0: # out of earshot
+            self.dropped += 1
+            return None
+
+        self.prune()
+        same = [voice for voice in self.voices if voice.sound is sound]
+        if len(same) >= self.caps.get(sound, VOICE_COUNT):
+            channel = self.steal(same, priority)
+        else:
+            busy = {voice.channel for voice in self.voices}
+            channel = next((channel for channel in self.channels if channel not in busy), None) or self.steal(self.voices, priority)
+        if channel is None:
+            self.dropped += 1
+            return None
+
+        channel.set_volume(volume)
+        channel.play(sound)
+        self.voices.append(Voice(channel, sound, priority, next(self.order)))
+        return channel
+
+voices = Voices()
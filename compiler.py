@@ -1,5 +1,9 @@
 import PyInstaller.__main__
-import os
+import os, subprocess, sys
+
+# levels and animation frames ship as baked files, rebuilt from their sources before every build
+subprocess.run([sys.executable, os.path.join('code', 'baked.py')], check = True)
+subprocess.run([sys.executable, os.path.join('code', 'atlas.py')], check = True)
 
 param = ['code/main.py', '--windowed', '--clean', '--name=Blade Hymn']
 for folder_path, _, names in os.walk(os.path.join('code')):
@@ -18,31 +22,15 @@ for _, subfolders, _ in os.walk(os.path.join('assets', 'audio')):
                 for file in [name for name in names if name.endswith('.mp3') or name.endswith('.wav')]:
                     param.append(f'--add-data=assets/audio/{subfolder}/{file}:assets/audio/{subfolder}')
 
-for _, subfolders, _ in os.walk(os.path.join('assets', 'graphics')):
-    for subfolder in [folder for folder in subfolders if folder != 'enemies' and folder != 'ui']:
-        for _, folders, _ in os.walk(os.path.join('assets', 'graphics', subfolder)):
-            for folder in folders:
-                for folder_path, _, names in os.walk(os.path.join('assets', 'graphics', subfolder, folder)):
-                    for file in [name for name in names if name.endswith('.png')]:
-                        param.append(f'--add-data=assets/graphics/{subfolder}/{folder}/{file}:assets/graphics/{subfolder}/{folder}')
+# animation frames ship packed into atlases, only the tile set images the levels cut tiles from stay loose
+for _, folders, _ in os.walk(os.path.join('assets', 'graphics', 'ground')):
+    for folder in folders:
+        for folder_path, _, names in os.walk(os.path.join('assets', 'graphics', 'ground', folder)):
+            for file in [name for name in names if name.endswith('.png')]:
+                param.append(f'--add-data=assets/graphics/ground/{folder}/{file}:assets/graphics/ground/{folder}')
 
 param.append('--add-data=assets/graphics/player/player.png:assets/graphics/player')
-
-for _, subfolders, _ in os.walk(os.path.join('assets', 'graphics', 'enemies')):
-    for subfolder in subfolders:
-        for _, folders, _ in os.walk(os.path.join('assets', 'graphics', 'enemies', subfolder)):
-            for folder in folders:
-                for folder_path, _, names in os.walk(os.path.join('assets', 'graphics', 'enemies', subfolder, folder)):
-                    for file in [name for name in names if name.endswith('.png')]:
-                        param.append(f'--add-data=assets/graphics/enemies/{subfolder}/{folder}/{file}:assets/graphics/enemies/{subfolder}/{folder}')
-
-for _, subfolders, _ in os.walk(os.path.join('assets', 'graphics', 'ui')):
-    for subfolder in subfolders:
-        for _, folders, _ in os.walk(os.path.join('assets', 'graphics', 'ui', subfolder)):
-            for folder in folders:
-                for folder_path, _, names in os.walk(os.path.join('assets', 'graphics', 'ui', subfolder, folder)):
-                    for file in [name for name in names if name.endswith('.png')]:
-                        param.append(f'--add-data=assets/graphics/ui/{subfolder}/{folder}/{file}:assets/graphics/ui/{subfolder}/{folder}')
+param.append('--add-data=assets/atlas:assets/atlas')
 
 # for line in param:
 #     print(line)
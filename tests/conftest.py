@@ -0,0 +1,13 @@
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "code"))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import pytest
+
+@pytest.fixture
+def display():
+    # converting frames and tiles needs a display mode
+    pygame.init()
+    return pygame.display.set_mode((1, 1))
@@ -0,0 +1,24 @@
+import atlas
+import utility
+from constants import *
+
+SETS = [
+    ("assets", "graphics", "player"),
+    ("assets", "graphics", "ui", "player")
+]
+
+def test_atlas_frames_match_loose_frames(display, tmp_path, monkeypatch):
+    monkeypatch.setattr(atlas, 'ATLAS_DIR', str(tmp_path))
+    monkeypatch.setattr(utility, 'ATLAS_DIR', str(tmp_path))
+    index = {'/'.join(path): atlas.build(path) for path in SETS}
+
+    for path in SETS:
+        decoded = utility.decode_subfolders(path, index)
+        assert decoded[0] is not None # read from the atlas, not the loose files
+        packed = utility.convert_subfolders(decoded)
+        loose = utility.import_subfolders(*path, atlas = False)
+
+        assert packed.keys() == loose.keys()
+        for name in loose:
+            assert [frame.get_size() for frame in packed[name]] == [frame.get_size() for frame in loose[name]]
+            assert [pygame.image.tobytes(frame, 'RGBA') for frame in packed[name]] == [pygame.image.tobytes(frame, 'RGBA') for frame in loose[name]]
@@ -0,0 +1,45 @@
+import pytmx
+from pytmx.util_pygame import load_pygame
+
+import baked
+from constants import *
+
+TILE_LAYERS = ['bg', 'ground', 'fg', 'barrier']
+OBJECT_LAYERS = ['player', 'objects']
+
+def tiles(tmx_map, layer):
+    return [(x, y, pygame.image.tobytes(surf, 'RGBA')) for x, y, surf in tmx_map.get_layer_by_name(layer).tiles()]
+
+def objects(tmx_map, layer, keys):
+    # baked objects carry their properties as attributes only, so the keys come from the tmx
+    return [
+        (obj.name, obj.x, obj.y, obj.width, obj.height, {key: getattr(obj, key, None) for key in keys})
+        for obj in tmx_map.get_layer_by_name(layer)
+    ]
+
+def test_baked_maps_match_tmx(display, tmp_path, monkeypatch):
+    monkeypatch.setattr(baked, 'BAKED_DIR', str(tmp_path))
+    for name in MAPS:
+        baked.bake(name)
+        baked_map = baked.load_map(name)
+        source = load_pygame(baked.source_path(name))
+        assert isinstance(baked_map, baked.BakedMap)
+
+        assert (baked_map.width, baked_map.height) == (source.width, source.height)
+        assert baked_map.get_layer_by_name("data").properties == source.get_layer_by_name("data").properties
+        for layer in TILE_LAYERS:
+            assert tiles(baked_map, layer) == tiles(source, layer)
+        for layer in OBJECT_LAYERS:
+            keys = sorted({key for obj in source.get_layer_by_name(layer) for key in obj.properties})
+            assert objects(baked_map, layer, keys) == objects(source, layer, keys)
+
+def test_corrupt_baked_map_falls_back_to_tmx(display, tmp_path, monkeypatch):
+    monkeypatch.setattr(baked, 'BAKED_DIR', str(tmp_path))
+    baked.bake('spring')
+    with open(baked.baked_path('spring'), 'rb') as lvlf:
+        data = lvlf.read()
+
+    for corrupt in [data[:10], data[:len(data) // 2], data[:baked.HEADER.size] + bytes(len(data) - baked.HEADER.size)]:
+        with open(baked.baked_path('spring'), 'wb') as lvlf:
+            lvlf.write(corrupt)
+        assert isinstance(baked.load_map('spring'), pytmx.TiledMap)
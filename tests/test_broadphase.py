@@ -0,0 +1,34 @@
+import random
+
+from constants import *
+from camera import Camera
+from groups import HitboxSprites
+from collision_benchmark import scan_surface_collisions, grid_surface_collisions, scan_probe, grid_probe
+from simulate import Simulation
+
+def test_terrain_grid_matches_full_scan():
+    level = Simulation().start('winter', seed = 0)
+    rng = random.Random(0)
+    for _ in range(2000):
+        prev_rect = pygame.FRect(rng.uniform(0, level.level_width), rng.uniform(0, level.level_height), 8, 32)
+        hitbox_rect = prev_rect.move(rng.uniform(-6, 6), rng.uniform(-6, 6))
+        for axis in ['x', 'y']:
+            scanned = scan_surface_collisions(level.collision_sprites, hitbox_rect.copy(), prev_rect, axis)
+            gridded = grid_surface_collisions(level.collision_sprites, hitbox_rect.copy(), prev_rect, axis)
+            assert scanned == gridded
+        assert scan_probe(level.collision_sprites, hitbox_rect) == grid_probe(level.collision_sprites, hitbox_rect)
+
+def test_hitbox_hash_matches_full_scan():
+    hitboxes = HitboxSprites(Camera(4000, 1000))
+    rng = random.Random(0)
+    for _ in range(300):
+        data = {'size': (rng.randint(4, 80), rng.randint(4, 80)), 'rel_pos': (0, 0), 'damage': 1, 'knockback': 0, 'stun': 0}
+        hitboxes.spawn(rng.choice(['player', 'enemy']), (rng.uniform(0, 4000), rng.uniform(0, 1000)), 1, data)
+    hitboxes.build_broadphase()
+
+    for _ in range(1000):
+        rect = pygame.FRect(rng.uniform(0, 4000), rng.uniform(0, 1000), rng.randint(4, 120), rng.randint(4, 120))
+        for tag in ['player', 'enemy']:
+            scanned = [sprite for sprite in hitboxes if sprite.tag == tag and sprite.rect.colliderect(rect)]
+            hashed = [sprite for sprite in hitboxes.nearby(tag, rect) if sprite.rect.colliderect(rect)]
+            assert scanned == hashed
@@ -0,0 +1,31 @@
+from benchmark import SCENARIOS
+from controls import controls
+from replay import Replay, digest
+from simulate import Simulation
+
+def test_replay_ends_in_recorded_state(tmp_path):
+    simulation = Simulation()
+    stage, ticks, timeline, setup = SCENARIOS['brawl']
+    level = simulation.start(stage, seed = 7)
+    recording = Replay.record(level)
+    simulation.simulate(level, 600, timeline)
+    recording.finish(level)
+
+    path = tmp_path / "brawl.replay"
+    recording.save(path)
+    replay = Replay.load(path)
+    assert (replay.stage, replay.seed, replay.start_time, replay.masks) == (recording.stage, recording.seed, recording.start_time, recording.masks)
+
+    assert simulation.run_replay(replay)['match']
+    assert digest(simulation.current_stage) == recording.final
+
+def test_replay_with_other_inputs_diverges():
+    simulation = Simulation()
+    stage, ticks, timeline, setup = SCENARIOS['brawl']
+    level = simulation.start(stage, seed = 7)
+    recording = Replay.record(level)
+    simulation.simulate(level, 600, timeline)
+    recording.finish(level)
+
+    recording.masks = bytearray(len(recording.masks)) # nothing held
+    assert not simulation.run_replay(recording)['match']
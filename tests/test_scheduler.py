@@ -0,0 +1,56 @@
+from simulate import Simulation
+from timer import scheduler
+from constants import STEP
+from controls import controls
+from sprite import Projectile
+from benchmark import SCENARIOS
+from settings import RIGHT_KEY
+
+def owned(level):
+    # other tests leave timers of their own levels behind, only this level's are counted
+    return len([entry for entry in scheduler.deadlines if entry[2].owner is level])
+
+def test_level_reset_drops_its_timers():
+    simulation = Simulation()
+    level = simulation.start('winter', seed = 0)
+    size = owned(level)
+
+    for seed in range(60):
+        level = simulation.start('winter', seed = seed)
+        for _ in range(30): # long enough for attacks and projectiles to start their own timers
+            level.update(scheduler.advance(STEP))
+        level = simulation.start('winter', seed = seed)
+        assert owned(level) == size
+
+def test_paused_scheduler_freezes_the_level():
+    simulation = Simulation()
+    level = simulation.start('winter', seed = 0)
+    for _ in range(30): # let the player land
+        level.update(scheduler.advance(STEP))
+
+    pos, time = level.player.rect.topleft, scheduler.time
+    scheduler.paused = True
+    controls.source = lambda: [RIGHT_KEY]
+    try:
+        for _ in range(30):
+            dt = scheduler.advance(STEP)
+            controls.poll()
+            level.update(dt)
+    finally:
+        scheduler.paused = False
+        controls.source = None
+    assert level.player.rect.topleft == pos
+    assert scheduler.time == time
+
+def test_level_reset_removes_projectiles():
+    simulation = Simulation()
+    stage, ticks, timeline, setup = SCENARIOS['archer_fight']
+    scheduler.time = 0 # the fight plays out the same from the same seed and start time
+    level = simulation.start(stage, seed = 0)
+    setup(level)
+    fired = lambda level: any(isinstance(sprite, Projectile) for sprite in level.damage_sprites)
+    simulation.simulate(level, ticks, timeline, done = fired)
+    assert fired(level)
+
+    level = simulation.start(stage, seed = 0)
+    assert not level.damage_sprites
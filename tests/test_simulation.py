@@ -0,0 +1,15 @@
+import pytest
+
+from simulate import Simulation
+
+def test_simulation_rejects_the_menu():
+    simulation = Simulation()
+    with pytest.raises(ValueError):
+        simulation.start('main_menu')
+
+def test_simulation_steps_through_game():
+    simulation = Simulation()
+    level = simulation.start('spring', seed = 0)
+    for _ in range(10): # the inherited game step, including the stage checks
+        simulation.step()
+    assert simulation.current_stage is level